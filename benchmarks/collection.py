@@ -0,0 +1,34 @@
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Helpers shared by the benchmarks, the plugins import each other as ansible_collections.bcoca.misc,
+so this checkout has to be importable as that collection.
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import atexit
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+
+COLLECTION = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_importable():
+    '''
+    Link this checkout as ansible_collections/bcoca/misc in a new temporary directory, put that on sys.path and return it.
+    The directory is removed at exit, benchmarks can keep their generated data there too.
+    '''
+    root = tempfile.mkdtemp(prefix='misc-bench-')
+    atexit.register(shutil.rmtree, root, True)
+    os.makedirs(os.path.join(root, 'ansible_collections', 'bcoca'))
+    os.symlink(COLLECTION, os.path.join(root, 'ansible_collections', 'bcoca', 'misc'))
+    sys.path.insert(0, root)
+    return root
+
+
+def collection_module(name):
+    ''' a plugin module by its path under plugins, like tests.network '''
+    return importlib.import_module('ansible_collections.bcoca.misc.plugins.%s' % name)
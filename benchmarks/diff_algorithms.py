@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Compare the diff filter algorithms on large config like inputs, with lots of repeated lines (blank lines, braces).
+
+    python benchmarks/diff_algorithms.py [number of lines] [percent of lines changed]
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import random
+import sys
+import time
+
+from collection import collection_module, make_importable
+
+
+def make_config(lines, changed, seed=42):
+    ''' a config made of small blocks, and a copy with some lines changed, removed or added '''
+    rnd = random.Random(seed)
+    a = []
+    while len(a) < lines:
+        a.append('server%d {' % len(a))
+        for dummy in range(rnd.randrange(2, 8)):
+            a.append('    option%d = %s;' % (rnd.randrange(20), rnd.choice(['yes', 'no', '1', '0'])))
+        a.extend(['}', ''])
+    a = a[:lines]
+
+    b = list(a)
+    for dummy in range(lines * changed // 100):
+        pos = rnd.randrange(len(b))
+        action = rnd.randrange(3)
+        if action == 0:
+            b[pos] = '    option%d = changed;' % rnd.randrange(20)
+        elif action == 1:
+            del b[pos]
+        else:
+            b.insert(pos, rnd.choice(['', '}', '    added = yes;']))
+    return '\n'.join(a), '\n'.join(b)
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    changed = int(sys.argv[2]) if len(sys.argv) > 2 else 1
+    make_importable()
+    strings = collection_module('filters.strings')
+    algorithms = sys.argv[3].split(',') if len(sys.argv) > 3 else strings.DIFF_ALGORITHMS
+    a, b = make_config(lines, changed)
+
+    print('%d lines, %d%% changed' % (lines, changed))
+    for algorithm in algorithms:
+        start = time.perf_counter()
+        diff = strings.do_diff(a, b, algorithm=algorithm)
+        elapsed = time.perf_counter() - start
+        edits = sum(1 for line in diff.split('\n') if line[:1] in ('+', '-') and line[:3] not in ('+++', '---'))
+        print('  %-10s %8.3fs %8d lines changed in the diff' % (algorithm, elapsed, edits))
+
+
+if __name__ == '__main__':
+    main()
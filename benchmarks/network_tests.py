@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Compare the network tests validators with plain ipaddress parsing (raising ValueError on bad input),
+for valid and invalid inputs, with the parse cache disabled and enabled.
+
+    python benchmarks/network_tests.py [number of inputs]
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import ipaddress
+import random
+import sys
+import time
+
+from collection import collection_module, make_importable
+
+
+def plain(factory):
+    ''' what the tests used to do '''
+    def valid(value):
+        try:
+            factory(value)
+        except ValueError:
+            return False
+        return True
+    return valid
+
+
+def make_inputs(count):
+    ''' (name, values, expected result, test name, plain validator) '''
+    rnd = random.Random(42)
+    garbage = ['host%d.example.com' % i for i in range(count // 2)] + ['%x' % rnd.getrandbits(40) for i in range(count - count // 2)]
+    return (
+        ('ipv4 valid', ['10.%d.%d.%d' % (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256)) for i in range(count)],
+         True, 'valid_ipv4_address', plain(ipaddress.IPv4Address)),
+        ('ipv4 invalid', garbage + ['10.%d.%d.300' % (i % 256, i // 256 % 256) for i in range(count // 4)],
+         False, 'valid_ipv4_address', plain(ipaddress.IPv4Address)),
+        ('ipv6 valid', [str(ipaddress.IPv6Address(rnd.getrandbits(128))) for i in range(count)],
+         True, 'valid_ipv6_address', plain(ipaddress.IPv6Address)),
+        ('ipv6 invalid', garbage + ['2001:db8::%x::1' % i for i in range(count // 4)],
+         False, 'valid_ipv6_address', plain(ipaddress.IPv6Address)),
+        ('ipv4 mask valid', [str(ipaddress.IPv4Network('0.0.0.0/%d' % (i % 33)).netmask) for i in range(count)],
+         True, 'valid_ipv4_mask', plain(lambda m: ipaddress.IPv4Network('0.0.0.0/%s' % m))),
+        ('ipv4 mask invalid', garbage + ['255.0.255.%d' % (i % 256) for i in range(count // 4)],
+         False, 'valid_ipv4_mask', plain(lambda m: ipaddress.IPv4Network('0.0.0.0/%s' % m))),
+        ('mac valid', [':'.join('%02x' % rnd.randrange(256) for dummy in range(6)) for i in range(count)],
+         True, 'valid_mac_address', None),
+        ('mac invalid', garbage, False, 'valid_mac_address', None),
+    )
+
+
+def timed(func, values):
+    ''' best of 3, per input in microseconds '''
+    best = None
+    for dummy in range(3):
+        start = time.perf_counter()
+        for value in values:
+            func(value)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best / len(values) * 1000000
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    make_importable()
+    tests = collection_module('tests.network')
+    print('%-20s %12s %12s %12s' % ('usec per input', 'ipaddress', 'no cache', 'cached'))
+    for name, values, expected, test, baseline in make_inputs(count):
+        func = getattr(tests, test)
+        wrong = [v for v in values if func(v) is not expected]
+        if wrong:
+            raise SystemExit('%s: %s gave the wrong answer for %r' % (name, test, wrong[:3]))
+
+        tests.configure_cache(0)
+        uncached = timed(func, values)
+        if baseline is None:
+            # mac addresses are only matched against a regex, nothing to compare or cache
+            print('%-20s %12s %12.3f %12s' % (name, '-', uncached, '-'))
+            continue
+
+        tests.configure_cache(len(values))
+        print('%-20s %12.3f %12.3f %12.3f' % (name, timed(baseline, values), uncached, timed(func, values)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Benchmarks for the paths of this collection we depend on, on generated data, no network needed.
+
+    python benchmarks/suite.py [--quick] [--only name,...] [--output results.json]
+
+Each case runs twice on freshly generated input, once for the time and once under tracemalloc for the peak memory,
+as tracing slows things down. Results are printed (or written) as JSON, progress goes to stderr.
+
+--quick only runs the smallest sizes of each benchmark, the full run goes up to 1M line hosts files (100k with compose)
+and 100k host vars trees and takes a while.
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import argparse
+import bz2
+import gc
+import gzip
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import time
+import tracemalloc
+
+from collection import COLLECTION, collection_module, make_importable
+
+# holds the generated data too, removed at exit
+WORKDIR = make_importable()
+os.environ['ANSIBLE_COLLECTIONS_PATH'] = WORKDIR
+
+import ansible  # noqa: E402 must come after setting the collections path
+from ansible.inventory.data import InventoryData  # noqa: E402
+from ansible.inventory.group import Group  # noqa: E402
+from ansible.inventory.host import Host  # noqa: E402
+from ansible.parsing.dataloader import DataLoader  # noqa: E402
+from ansible.plugins import loader as plugin_loader  # noqa: E402
+
+from diff_algorithms import make_config  # noqa: E402
+from uncompress_loop import make_data  # noqa: E402
+
+if hasattr(plugin_loader, 'init_plugin_loader'):
+    plugin_loader.init_plugin_loader([WORKDIR])
+
+
+def measure(setup, run):
+    ''' (seconds, peak traced bytes, run result) of run(*setup()), setup is repeated so caches start cold both times '''
+    args = setup()
+    gc.collect()
+    start = time.perf_counter()
+    run(*args)
+    elapsed = time.perf_counter() - start
+
+    args = setup()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        result = run(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak, result
+
+
+# generators
+
+def make_hosts_file(path, lines, seed=42):
+    ''' /etc/hosts like file, with comments, blank lines, inline comments and repeated addresses '''
+    rnd = random.Random(seed)
+    with open(path, 'w') as f:
+        f.write('# generated hosts file\n127.0.0.1 localhost\n::1 localhost ip6-localhost\n\n')
+        for i in range(lines):
+            if i % 50 == 0:
+                f.write('# rack %d\n' % (i // 50))
+                continue
+            ip = '10.%d.%d.%d' % (i >> 16 & 255, i >> 8 & 255, i & 255)
+            if rnd.random() < 0.02:
+                # same address again with another alias
+                f.write('%s alias%d.example.com\n' % (ip, i))
+            f.write('%s host%d.example.com host%d # dc%d\n' % (ip, i, i, i % 4))
+
+
+def make_vars_tree(root, hosts, groups=50, global_files=20, seed=42):
+    ''' host_vars and group_vars dirs for site_host_group and a globals dir for global_all '''
+    rnd = random.Random(seed)
+    for subdir in ('host_vars', 'group_vars', 'globals'):
+        os.makedirs(os.path.join(root, subdir))
+    for i in range(hosts):
+        with open(os.path.join(root, 'host_vars', 'host%d.yml' % i), 'w') as f:
+            f.write('rack: %d\nrole: %s\nports: [%d, %d]\n' % (i // 40, rnd.choice(['web', 'db', 'cache']), 8000 + i % 100, 9000 + i % 100))
+    for g in range(groups):
+        with open(os.path.join(root, 'group_vars', 'group%d.yml' % g), 'w') as f:
+            f.write('group_id: %d\nntp: [ntp1.example.com, ntp2.example.com]\n' % g)
+    for n in range(global_files):
+        with open(os.path.join(root, 'globals', 'global%02d.yml' % n), 'w') as f:
+            f.write('setting%d:\n  enabled: true\n  values: %s\n' % (n, json.dumps(list(range(20)))))
+
+
+def make_facts(hosts, seed=42):
+    rnd = random.Random(seed)
+    return dict(('host%d' % i, {
+        'interfaces': dict(('eth%d' % j, {'ip': '10.%d.%d.%d' % (i >> 8 & 255, i & 255, j), 'mtu': 1500, 'flags': ['up', 'broadcast']})
+                           for j in range(4)),
+        'mounts': [{'path': '/m%d' % k, 'size': rnd.randrange(1 << 30)} for k in range(8)],
+    }) for i in range(hosts))
+
+
+# benchmarks, each yields (params, setup, run)
+
+# largest hosts file to compose, by quick
+COMPOSE_MAX_LINES = {True: 1000, False: 100000}
+
+
+def bench_etc_hosts(quick):
+    ''' parse a generated hosts file, with and without compose and keyed groups '''
+    plugin = plugin_loader.inventory_loader.get('bcoca.misc.etc_hosts')
+    for lines in (1000, 10000) if quick else (1000, 10000, 100000, 1000000):
+        hosts_file = os.path.join(WORKDIR, 'hosts-%d' % lines)
+        make_hosts_file(hosts_file, lines)
+        # templating costs milliseconds per host, 1M hosts would take hours
+        for compose in (False, True) if lines <= COMPOSE_MAX_LINES[quick] else (False,):
+            config = {'plugin': 'bcoca.misc.etc_hosts', 'hosts_file': hosts_file, 'inventory_name': 'first'}
+            if compose:
+                config['compose'] = {'octet': "ansible_host.split('.')[2]"}
+                config['keyed_groups'] = [{'key': 'etc_hosts_comments[0] | default("none")', 'prefix': 'dc'}]
+            config_file = os.path.join(WORKDIR, 'etc_hosts.yml')
+
+            def setup():
+                with open(config_file, 'w') as f:
+                    json.dump(config, f)
+                return InventoryData(), DataLoader()
+
+            def run(inventory, loader):
+                plugin.parse(inventory, loader, config_file)
+                return {'hosts': len(inventory.hosts), 'groups': len(inventory.groups)}
+
+            yield {'lines': lines, 'compose': compose}, setup, run
+
+
+def _vars_plugin(name, option, path):
+
+    plugin = plugin_loader.vars_loader.get(name)
+    plugin.set_options(direct={option: path})
+    return plugin
+
+
+def bench_vars(quick):
+    ''' site_host_group for every host and group, global_all once per host, as the vars manager would '''
+    for hosts in (10000,) if quick else (10000, 100000):
+        root = os.path.join(WORKDIR, 'vars-%d' % hosts)
+        make_vars_tree(root, hosts)
+        site = _vars_plugin('bcoca.misc.site_host_group', 'path', root)
+        globals_all = _vars_plugin('bcoca.misc.global_all', 'path', os.path.join(root, 'globals'))
+        host_entities = [Host('host%d' % i) for i in range(hosts)]
+        group_entities = [Group('group%d' % g) for g in range(50)]
+        all_group = Group('all')
+
+        for name, plugin in (('site_host_group', site), ('global_all', globals_all)):
+            def setup(plugin=plugin):
+                sys.modules[type(plugin).__module__].FOUND.clear()
+                return (DataLoader(),)
+
+            if name == 'site_host_group':
+                def run(loader, plugin=plugin):
+                    loaded = 0
+                    for entity in group_entities + host_entities:
+                        loaded += len(plugin.get_vars(loader, root, entity))
+                    return {'vars': loaded}
+                params = {'plugin': name, 'hosts': hosts}
+            else:
+                # every call loads all the files again, one per hosts would take many minutes, seconds per call is what to look at
+                calls = hosts // 100
+
+                def run(loader, plugin=plugin, calls=calls):
+                    for dummy in range(calls):
+                        data = plugin.get_vars(loader, root, all_group)
+                    return {'vars': len(data)}
+                params = {'plugin': name, 'hosts': hosts, 'calls': calls}
+
+            yield params, setup, run
+
+
+def bench_uncompress(quick):
+    ''' every available codec, on half text half zeros data '''
+    spec = importlib.util.spec_from_file_location('uncompress', os.path.join(COLLECTION, 'plugins', 'modules', 'uncompress.py'))
+    uncompress = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(uncompress)
+
+    codecs = [('gzip', gzip.compress, uncompress.ungzip), ('bzip2', bz2.compress, uncompress.unbzip)]
+    if uncompress.ZSTD_IMP_ERR is None:
+        if getattr(uncompress, 'zstd', None) is not None:
+            codecs.append(('zstd', uncompress.zstd.compress, uncompress.unzstd))
+        else:
+            codecs.append(('zstd', lambda data: uncompress.zstandard.ZstdCompressor().compress(data), uncompress.unzstd))
+    if uncompress.LZ4_IMP_ERR is None:
+        codecs.append(('lz4', uncompress.lz4.frame.compress, uncompress.unlz4))
+
+    for size in (1, 16) if quick else (1, 16, 64):
+        data = make_data(size * 1024 * 1024)
+        for name, compress, func in codecs:
+            src = os.path.join(WORKDIR, 'data.%s' % name)
+            dest = os.path.join(WORKDIR, 'data.out')
+            with open(src, 'wb') as f:
+                f.write(compress(data))
+
+            def setup(dest=dest):
+                if os.path.exists(dest):
+                    os.remove(dest)
+                return ()
+
+            def run(src=src, dest=dest, func=func):
+                func(src, dest)
+                return {'compressed_bytes': os.path.getsize(src), 'uncompressed_bytes': os.path.getsize(dest)}
+
+            yield {'codec': name, 'mb': size}, setup, run
+
+
+def bench_network(quick):
+    ''' the scalar tests over a list, bulk classification and network membership '''
+    tests = collection_module('tests.network')
+    filters = collection_module('filters.network')
+    rnd = random.Random(42)
+    networks = ['%d.%d.%d.0/%d' % (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256), rnd.choice([16, 20, 24, 28])) for i in range(10000)]
+    for count in (10000,) if quick else (10000, 100000):
+        addresses = ['%d.%d.%d.%d' % tuple(rnd.randrange(256) for dummy in range(4)) for i in range(count * 8 // 10)]
+        addresses += ['2001:db8::%x' % i for i in range(count // 10)] + ['host%d' % i for i in range(count // 10)]
+
+        def setup():
+            tests.configure_cache()
+            tests._indexes.clear()
+            return ()
+
+        def in_index(index):
+            # the network_index filter result, as select('in_any_network', networks | network_index) uses it
+            return {'matched': len([a for a in addresses if tests.in_any_network(a, index)]), 'networks': len(networks)}
+
+        cases = (
+            ('valid_and_private', lambda: {'private': len([a for a in addresses if tests.valid_ip_address(a) and tests.is_private(a)])}),
+            ('ip_classify', lambda: {'groups': dict((k, len(v)) for k, v in filters.ip_classify(addresses, groups=True).items())}),
+            ('in_any_network', lambda: {'matched': len([a for a in addresses if tests.in_any_network(a, networks)]), 'networks': len(networks)}),
+            ('in_any_network_index', lambda: in_index(filters.network_index(networks))),
+        )
+        for name, run in cases:
+            yield {'case': name, 'addresses': count}, setup, run
+
+
+def bench_diff(quick):
+    ''' the diff filter algorithms on config like text and data_diff on facts like data '''
+    strings = collection_module('filters.strings')
+
+    def setup():
+        strings._diffs.clear()
+        return ()
+
+    for lines in (10000,) if quick else (10000, 100000):
+        a, b = make_config(lines, 1)
+        # difflib is quadratic on these, minutes at 100k lines
+        for algorithm in strings.DIFF_ALGORITHMS if lines <= 10000 else ('myers', 'patience'):
+            yield ({'case': 'diff', 'algorithm': algorithm, 'lines': lines}, setup,
+                   lambda algorithm=algorithm, a=a, b=b: {'diff_bytes': len(strings.do_diff(a, b, algorithm=algorithm))})
+
+    for hosts in (1000,) if quick else (1000, 10000):
+        a = make_facts(hosts)
+        b = make_facts(hosts)
+        rnd = random.Random(1)
+        for host in rnd.sample(sorted(b), hosts // 100):
+            b[host]['interfaces']['eth1']['mtu'] = 9000
+        yield {'case': 'data_diff', 'hosts': hosts}, setup, lambda a=a, b=b: {'changes': len(strings.data_diff(a, b))}
+
+
+BENCHMARKS = {
+    'etc_hosts': bench_etc_hosts,
+    'vars': bench_vars,
+    'uncompress': bench_uncompress,
+    'network': bench_network,
+    'diff': bench_diff,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().split('\n')[0])
+    parser.add_argument('--quick', action='store_true', help='only the smallest sizes')
+    parser.add_argument('--only', help='comma separated benchmarks to run, out of %s' % ', '.join(BENCHMARKS))
+    parser.add_argument('--output', help='write the JSON results here instead of stdout')
+    args = parser.parse_args()
+
+    names = args.only.split(',') if args.only else list(BENCHMARKS)
+    unknown = [name for name in names if name not in BENCHMARKS]
+    if unknown:
+        parser.error('unknown benchmarks: %s' % ', '.join(unknown))
+
+    report = {
+        'python': platform.python_version(),
+        'ansible': ansible.__version__,
+        'platform': platform.platform(),
+        'quick': args.quick,
+        'results': [],
+    }
+    for name in names:
+        try:
+            for params, setup, run in BENCHMARKS[name](args.quick):
+                seconds, peak, extra = measure(setup, run)
+                result = dict(benchmark=name, params=params, seconds=round(seconds, 6), peak_bytes=peak)
+                if extra:
+                    result['result'] = extra
+                report['results'].append(result)
+                sys.stderr.write('%-12s %-60s %10.3fs %10.1fMB\n' % (name, json.dumps(params, sort_keys=True), seconds, peak / 1048576.0))
+        except ImportError as e:
+            # code that does not load with this python or ansible, the rest can still run
+            report['results'].append(dict(benchmark=name, skipped=str(e)))
+            sys.stderr.write('%-12s skipped: %s\n' % (name, e))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Compare the uncompress module copy loop (copystream) with shutil.copyfileobj.
+
+    python benchmarks/uncompress_loop.py [size in MB]
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import bz2
+import gzip
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+MODULE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'plugins', 'modules', 'uncompress.py')
+
+
+def load_module():
+    spec = importlib.util.spec_from_file_location('uncompress', MODULE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_data(size):
+    ''' half compressible text, half zeros, like a mostly empty disk image '''
+    chunk = b''.join(b'line %d of some very compressible text\n' % i for i in range(2000))
+    text = (chunk * (size // 2 // len(chunk) + 1))[:size // 2]
+    return text + bytes(size - len(text))
+
+
+def timed(func, *args):
+    ''' best of 3 '''
+    best = None
+    for dummy in range(3):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    uncompress = load_module()
+    data = make_data(size * 1024 * 1024)
+    workdir = tempfile.mkdtemp()
+    try:
+        out = os.path.join(workdir, 'out')
+        for name, opener, compress in (('gzip', gzip.open, gzip.compress), ('bzip2', bz2.BZ2File, bz2.compress)):
+            src = os.path.join(workdir, 'data.' + name)
+            with open(src, 'wb') as f:
+                f.write(compress(data))
+
+            def copyfileobj():
+                with opener(src, 'rb') as f_in, open(out, 'wb') as f_out:
+                    shutil.copyfileobj(f_in, f_out)
+
+            def copystream(bufsize, sparse=False):
+                with opener(src, 'rb') as f_in, open(out, 'wb') as f_out:
+                    uncompress.copystream(f_in, f_out, bufsize, sparse)
+
+            print('%s, %dMB uncompressed' % (name, size))
+            print('  %-28s %.3fs' % ('shutil.copyfileobj', timed(copyfileobj)))
+            for bufsize in (65536, 262144, 1048576, 4194304):
+                print('  %-28s %.3fs' % ('copystream %dk' % (bufsize // 1024), timed(copystream, bufsize)))
+            print('  %-28s %.3fs (%dMB on disk)' % ('copystream 64k sparse', timed(copystream, 65536, True),
+                                                  os.stat(out).st_blocks * 512 // 1024 // 1024))
+    finally:
+        shutil.rmtree(workdir)
+
+
+if __name__ == '__main__':
+    main()
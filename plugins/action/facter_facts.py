@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# (c) 2023 Ansible Project
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.plugins.action import ActionBase
+
+
+class ActionModule(ActionBase):
+
+    def run(self, tmp=None, task_vars=None):
+        ''' handler for facter_facts, rebuilds the full facts from the ones we have when the module only sends what changed '''
+        if task_vars is None:
+            task_vars = dict()
+
+        result = super(ActionModule, self).run(tmp, task_vars)
+
+        if not boolean(self._task.args.get('delta', False)):
+            module_result = self._execute_module(task_vars=task_vars)
+            if 'facter' in module_result.get('ansible_facts', {}):
+                # the facter fact no longer matches the generation, a later delta run has to get everything again
+                module_result['ansible_facts']['facter_generation'] = None
+            result.update(module_result)
+            return result
+
+        # what the controller already has for this host, from the fact cache or an earlier task
+        known = task_vars.get('ansible_facts', {})
+        base = known.get('facter_generation') if isinstance(known.get('facter'), dict) else None
+
+        new_module_args = self._task.args.copy()
+        new_module_args['delta_generation'] = base
+        module_result = self._execute_module(module_args=new_module_args, task_vars=task_vars)
+
+        delta = module_result.pop('facter_delta', None)
+        if delta is not None:
+            if delta['full'] or delta['base'] != base:
+                facter = dict(delta['changed'])
+            else:
+                facter = dict(known['facter'])
+                facter.update(delta['changed'])
+                for key in delta['removed']:
+                    facter.pop(key, None)
+            module_result.setdefault('ansible_facts', {})['facter'] = facter
+
+        result.update(module_result)
+        return result
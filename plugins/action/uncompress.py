@@ -7,15 +7,175 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import fcntl
+import hashlib
+import json
 import os
+import time
 
+from ansible import constants as C
+from ansible.executor.interpreter_discovery import discover_interpreter
+from ansible.module_utils._text import to_bytes
+from ansible.module_utils.parsing.convert_bool import boolean
+from ansible.module_utils.six.moves import shlex_quote
 from ansible.plugins.action import ActionBase
-from ansible.utils.boolean import boolean
+from ansible.utils.hashing import checksum
+
+# local archive checksums, keyed on (path, size, mtime) so a changed file gets checksummed again
+CHECKSUMS = {}
+
+
+def run_cache(key, compute):
+    '''
+    Return the value for key from a cache in the local tmp dir, which lives for the whole run and is shared by all forks,
+    computing and storing it if missing. A lock per key makes other forks wait for the first one instead of repeating the work.
+    '''
+    try:
+        cache_dir = os.path.join(C.DEFAULT_LOCAL_TMP, 'uncompress')
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        path = os.path.join(cache_dir, hashlib.sha1(to_bytes(key, errors='surrogate_or_strict')).hexdigest())
+        lock = open(path + '.lock', 'a')
+    except (IOError, OSError):
+        return compute()
+
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if os.path.exists(path):
+            with open(path) as f:
+                return f.read()
+
+        value = compute()
+        with open(path + '.tmp', 'w') as f:
+            f.write(value)
+        os.rename(path + '.tmp', path)
+        return value
+    finally:
+        lock.close()
+
+
+def local_checksum(path):
+    ''' checksum a local file only once per run, as long as it does not change '''
+    st = os.stat(path)
+    key = (path, st.st_size, st.st_mtime)
+    if key not in CHECKSUMS:
+        CHECKSUMS[key] = run_cache('checksum\0%s\0%d\0%r' % key, lambda: checksum(path))
+    return CHECKSUMS[key]
+
+
+# file arguments that change the result, a manifest is only valid for the same ones
+FILE_ARGS = ('mode', 'owner', 'group', 'seuser', 'serole', 'selevel', 'setype', 'attributes')
+
+# takes (manifest, dest) pairs and prints a list with each manifest plus the current stat of its dest, or {} if either is missing
+READ_MANIFESTS = (
+    "import json, os, sys\n"
+    "args, out = sys.argv[1:], []\n"
+    "for i in range(0, len(args), 2):\n"
+    "    try:\n"
+    "        m = json.load(open(args[i]))\n"
+    "        s = os.stat(args[i + 1])\n"
+    "        m['current'] = [s.st_size, s.st_mtime_ns, s.st_ino, s.st_mode, s.st_uid, s.st_gid]\n"
+    "    except Exception:\n"
+    "        m = {}\n"
+    "    out.append(m)\n"
+    "print(json.dumps(out))\n"
+)
+
+
+# takes paths and prints a list with the sha1 of each, or null if it is not a regular file we can read
+CACHED_CHECKSUMS = (
+    "import hashlib, json, os, stat, sys\n"
+    "out = []\n"
+    "for path in sys.argv[1:]:\n"
+    "    try:\n"
+    "        if not stat.S_ISREG(os.lstat(path).st_mode):\n"
+    "            raise OSError(path)\n"
+    "        h = hashlib.sha1()\n"
+    "        with open(path, 'rb') as f:\n"
+    "            for block in iter(lambda: f.read(1048576), b''):\n"
+    "                h.update(block)\n"
+    "        out.append(h.hexdigest())\n"
+    "    except Exception:\n"
+    "        out.append(None)\n"
+    "print(json.dumps(out))\n"
+)
+
+
+def manifest_path(dest):
+    ''' the manifest the module writes for dest, must match the module '''
+    dname, fname = os.path.split(dest)
+    return os.path.join(dname, '.%s.uncompress' % fname)
+
+
+def args_checksum(args):
+    ''' digest of the file arguments in effect, so changing them invalidates the manifest '''
+    return hashlib.sha1(json.dumps(dict((k, args.get(k)) for k in FILE_ARGS), sort_keys=True).encode('utf-8')).hexdigest()
 
 
 class ActionModule(ActionBase):
 
-    TRANSFERS_FILES = True
+    TRANSFERS_FILES = False
+
+    def _python(self, task_vars):
+        ''' the python modules run with on the target, discovered the same way _execute_module does when it is not known yet '''
+        if self._task.delegate_to:
+            use_vars = task_vars.get('ansible_delegated_vars')[self._task.delegate_to]
+        else:
+            use_vars = task_vars
+
+        python = self._templar.template(C.config.get_config_value('INTERPRETER_PYTHON', variables=use_vars))
+        if not python.startswith('auto'):
+            return python
+
+        discovered = use_vars.get('ansible_facts', {}).get('discovered_interpreter_python')
+        if discovered is None:
+            discovered = discover_interpreter(action=self, interpreter_name='python', discovery_mode=python, task_vars=use_vars)
+            # the module run that may follow reuses it, and the controller keeps it as a fact like after any module
+            use_vars.setdefault('ansible_facts', {})['discovered_interpreter_python'] = discovered
+            if not self._task.delegate_to or self._task.delegate_facts:
+                self._discovered_interpreter_key = 'discovered_interpreter_python'
+                self._discovered_interpreter = discovered
+        return discovered
+
+    def _read_manifests(self, dests, task_vars):
+        ''' one remote call to get the manifests kept next to all dests, with their current stat '''
+        python = self._python(task_vars)
+        paths = ' '.join('%s %s' % (shlex_quote(manifest_path(dest)), shlex_quote(dest)) for dest in dests)
+        res = self._low_level_execute_command('%s -c %s %s' % (python, shlex_quote(READ_MANIFESTS), paths), sudoable=True)
+        try:
+            manifests = json.loads(res['stdout'])
+        except ValueError:
+            manifests = []
+
+        if len(manifests) != len(dests):
+            manifests = [{}] * len(dests)
+        return manifests
+
+    def _cached_checksums(self, paths, task_vars):
+        ''' one remote call to checksum the archives of all items in the archive cache, None for the ones not there '''
+        python = self._python(task_vars)
+        res = self._low_level_execute_command('%s -c %s %s' % (python, shlex_quote(CACHED_CHECKSUMS), ' '.join(shlex_quote(path) for path in paths)),
+                                              sudoable=True)
+        try:
+            checksums = json.loads(res['stdout'])
+        except ValueError:
+            checksums = []
+
+        if len(checksums) != len(paths):
+            checksums = [None] * len(paths)
+        return checksums
+
+    def _manifest_matches(self, manifest, source_checksum):
+        ''' is dest still what we produced from this same archive and arguments '''
+        return bool(manifest) and manifest.get('checksum') == source_checksum and \
+            manifest.get('args') == args_checksum(self._task.args) and manifest.get('stat') == manifest.get('current')
+
+    def _find_source(self, source):
+        ''' resolve a local source, a few stats are cheaper than sharing the answer between forks '''
+        source = os.path.expanduser(source)
+        if self._task._role is not None:
+            return self._loader.path_dwim_relative(self._task._role._role_path, 'files', source)
+        return self._loader.path_dwim_relative(self._loader.get_basedir(), 'files', source)
 
     def run(self, tmp=None, task_vars=None):
         ''' handler for uncompress operations '''
@@ -24,70 +184,145 @@ class ActionModule(ActionBase):
 
         result = super(ActionModule, self).run(tmp, task_vars)
 
-        source = self._task.args.get('src', None)
-        dest = self._task.args.get('dest', None)
         copy = boolean(self._task.args.get('copy', True))
+        manifest = boolean(self._task.args.get('manifest', False))
+        archive_cache = self._task.args.get('archive_cache', None)
 
-        if source is None or dest is None:
-            result['failed'] = True
-            result['msg'] = "src (or content) and dest are required"
-            return result
+        # a single src/dest is handled as a batch of one
+        batch = self._task.args.get('items', None) is not None
+        if batch:
+            items = self._task.args['items']
+            if not isinstance(items, list) or [i for i in items if not isinstance(i, dict) or i.get('src') is None or i.get('dest') is None]:
+                result['failed'] = True
+                result['msg'] = "items must be a list of dictionaries with src and dest"
+                return result
+        else:
+            items = [dict(src=self._task.args.get('src', None), dest=self._task.args.get('dest', None))]
+            if items[0]['src'] is None or items[0]['dest'] is None:
+                result['failed'] = True
+                result['msg'] = "src (or content) and dest are required"
+                return result
 
-        remote_user = task_vars.get('ansible_ssh_user') or self._play_context.remote_user
-        if not tmp:
-            tmp = self._make_tmp_path(remote_user)
+        todo = []
+        for item in items:
+            source = self._find_source(item['src']) if copy else os.path.expanduser(item['src'])
+            todo.append(dict(item, source=source, original_basename=os.path.basename(source)))
 
-        dname, junk = os.path.split(dest)
-        dest = self._remote_expand_user(dname)
-        source = os.path.expanduser(source)
+        # nothing to transfer or run for the items whose dest is still what this archive produced last time
+        results = {}
+        if copy and manifest:
+            manifests = self._read_manifests([self._remote_expand_user(item['dest']) for item in todo], task_vars)
+            for idx, item in enumerate(todo):
+                if self._manifest_matches(manifests[idx], local_checksum(item['source'])):
+                    results[idx] = dict(changed=False, transfer_skipped=True, manifest_matched=True)
 
-        if copy:
-            if self._task._role is not None:
-                source = self._loader.path_dwim_relative(self._task._role._role_path, 'files', source)
-            else:
-                source = self._loader.path_dwim_relative(self._loader.get_basedir(), 'files', source)
-
-        remote_checksum = self._remote_checksum(dest, all_vars=task_vars)
-        if remote_checksum != '3':
-            result['failed'] = True
-            result['msg'] = "dest '%s' must be an existing dir" % dest
-            return result
-        elif remote_checksum == '4':
-            result['failed'] = True
-            result['msg'] = "python isn't present on the system.  Unable to compute checksum"
-            return result
+            if len(results) == len(todo):
+                if self._discovered_interpreter_key:
+                    result['ansible_facts'] = {self._discovered_interpreter_key: self._discovered_interpreter}
+                if batch:
+                    result.update(dict(changed=False, results=[dict(results[idx], dest=todo[idx]['dest']) for idx in range(len(todo))]))
+                else:
+                    result.update(results[0])
+                return result
+
+        # only now that something has to be transferred or run, reusing the tmp dir if the base class already made one
+        if copy and self._connection._shell.tmpdir is None:
+            self._make_tmp_path(task_vars.get('ansible_ssh_user') or self._play_context.remote_user)
+        tmp = self._connection._shell.tmpdir
 
+        # for batches the module checks every dest on its own and reports per item
+        if not batch:
+            dest = self._remote_expand_user(os.path.dirname(todo[0]['dest']))
+            dest_stat = self._execute_remote_stat(dest, all_vars=task_vars, follow=True, checksum=False)
+            if not dest_stat['exists'] or not dest_stat['isdir']:
+                result['failed'] = True
+                result['msg'] = "dest '%s' must be an existing dir" % dest
+                return result
+
+        pending = [idx for idx in range(len(todo)) if idx not in results]
+        transferred = []
         if copy:
-            # transfer the file to a remote tmp location
-            junk, fname = os.path.split(source)
-            tmp_src = tmp + fname
-            self._connection.put_file(source, tmp_src)
+            for idx in pending:
+                item = todo[idx]
+                item['transfer_time'] = 0.0
+                item['transfer_skipped'] = False
+                if archive_cache or manifest:
+                    item['checksum'] = local_checksum(item['source'])
+                if archive_cache:
+                    # archives we transferred before are kept on the target under their checksum
+                    item['cached_src'] = os.path.join(self._remote_expand_user(archive_cache), '%s-%s' % (item['checksum'], item['original_basename']))
+
+            if archive_cache:
+                cached = self._cached_checksums([todo[idx]['cached_src'] for idx in pending], task_vars)
+                for idx, cached_checksum in zip(pending, cached):
+                    todo[idx]['transfer_skipped'] = cached_checksum == todo[idx]['checksum']
+
+            for idx in pending:
+                item = todo[idx]
+                fname = item['original_basename']
+                if item['transfer_skipped']:
+                    item['tmp_src'] = item['cached_src']
+                else:
+                    # transfer the file to a remote tmp location, in a batch different sources can share a name
+                    item['tmp_src'] = tmp + ('%d-%s' % (idx, fname) if batch else fname)
+                    start = time.time()
+                    self._connection.put_file(item['source'], item['tmp_src'])
+                    item['transfer_time'] = time.time() - start
+                    transferred.append(item['tmp_src'])
 
         # handle diff mode client side
         # handle check mode client side
         # fix file permissions when the copy is done as a different user
-        if copy:
-            if self._play_context.become and self._play_context.become_user != 'root':
-                if not self._play_context.check_mode:
-                    self._remote_chmod('a+r', tmp_src)
-
-            # Build temporary module_args.
-            new_module_args = self._task.args.copy()
-            new_module_args.update(
-                dict(
-                    src=tmp_src,
-                    original_basename=os.path.basename(source),
-                ),
-            )
+        if transferred and self._play_context.become and self._play_context.become_user != 'root':
+            if not self._play_context.check_mode:
+                if batch:
+                    self._low_level_execute_command('chmod a+r %s' % ' '.join(shlex_quote(path) for path in transferred), sudoable=False)
+                else:
+                    self._remote_chmod('a+r', transferred[0])
+
+        # Build temporary module_args.
+        new_module_args = self._task.args.copy()
+        if manifest:
+            new_module_args['manifest_args'] = args_checksum(self._task.args)
 
+        module_items = []
+        for idx in pending:
+            item = todo[idx]
+            args = dict(src=item['src'], dest=item['dest'], original_basename=item['original_basename'])
+            if copy:
+                args['src'] = item['tmp_src']
+            if 'checksum' in item:
+                args['checksum'] = item['checksum']
+            module_items.append(args)
+
+        if batch:
+            new_module_args['items'] = module_items
         else:
-            new_module_args = self._task.args.copy()
-            new_module_args.update(
-                dict(
-                    original_basename=os.path.basename(source),
-                ),
-            )
+            new_module_args.update(module_items[0])
 
         # execute the uncompress module now, with the updated args
-        result.update(self._execute_module(module_args=new_module_args, task_vars=task_vars))
+        module_result = self._execute_module(module_args=new_module_args, task_vars=task_vars)
+
+        if batch:
+            for idx, item_result in zip(pending, module_result.pop('results', [])):
+                results[idx] = item_result
+        else:
+            results[0] = module_result
+
+        for idx in pending:
+            if copy and idx in results:
+                self._add_transfer(results[idx], todo[idx])
+        result.update(module_result)
+
+        if batch and len(results) == len(todo):
+            result['results'] = [dict(results[idx], dest=todo[idx]['dest']) for idx in range(len(todo))]
+
         return result
+
+    def _add_transfer(self, result, item):
+        ''' the module cannot know about the transfer '''
+        result['transfer_skipped'] = item['transfer_skipped']
+        if 'metrics' in result:
+            result['metrics']['seconds']['transfer'] = round(item['transfer_time'], 6)
+            if item['transfer_time'] > 0:
+                result['metrics']['mb_per_second']['transfer'] = round(result['metrics']['compressed_bytes'] / 1048576.0 / item['transfer_time'], 3)
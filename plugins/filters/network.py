@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+from collections.abc import Iterable, Mapping
+
+from ansible.errors import AnsibleFilterError
+from ansible.module_utils.six import string_types
+from ansible_collections.bcoca.misc.plugins.plugin_utils.oui import lookup
+from ansible_collections.bcoca.misc.plugins.tests.network import cache_info, network_index, parse, valid_mac_address
+
+# same properties as the network tests, flag name -> ipaddress attribute
+FLAGS = (
+    ('private', 'is_private'),
+    ('global', 'is_global'),
+    ('multicast', 'is_multicast'),
+    ('loopback', 'is_loopback'),
+    ('link_local', 'is_link_local'),
+    ('reserved', 'is_reserved'),
+    ('unspecified', 'is_unspecified'),
+)
+
+
+def _classify(address):
+
+    ip = parse('ip', address)
+    if ip is None:
+        flags = dict((name, False) for name, attr in FLAGS)
+        flags.update(address=address, valid=False, version=None)
+        return flags
+
+    flags = dict((name, getattr(ip, attr)) for name, attr in FLAGS)
+    flags.update(address=address, valid=True, version=ip.version)
+    return flags
+
+
+def ip_classify(addresses, groups=False):
+    '''
+    Classify a list of addresses in one go, each distinct address is only parsed once.
+    Returns a list with the flags for each address or, with groups, the addresses that have each flag.
+    '''
+    if isinstance(addresses, string_types):
+        addresses = [addresses]
+    elif isinstance(addresses, Mapping) or not isinstance(addresses, Iterable):
+        raise AnsibleFilterError('ip_classify expects a list of addresses, got %s' % type(addresses))
+
+    seen = {}
+    classified = []
+    for address in addresses:
+        try:
+            flags = seen[address]
+        except KeyError:
+            flags = seen[address] = _classify(address)
+        except TypeError:
+            # not hashable, so cannot be an address anyways
+            flags = _classify(address)
+        classified.append(flags)
+
+    if not groups:
+        return [dict(flags) for flags in classified]
+
+    grouped = dict((name, []) for name in ('valid', 'invalid', 'ipv4', 'ipv6') + tuple(name for name, attr in FLAGS))
+    for flags in classified:
+        address = flags['address']
+        if not flags['valid']:
+            grouped['invalid'].append(address)
+            continue
+        grouped['valid'].append(address)
+        grouped['ipv%d' % flags['version']].append(address)
+        for name, attr in FLAGS:
+            if flags[name]:
+                grouped[name].append(address)
+
+    return grouped
+
+
+def network_cache_info(dummy=None):
+    ''' statistics of the cache of parsed addresses shared by the network tests and filters '''
+    return cache_info()
+
+
+def oui_vendor(mac, table=None):
+    '''
+    Vendor registered for the OUI of a mac address, None if it is not valid or unknown.
+    Needs a table built from the IEEE registry with plugins/plugin_utils/oui.py, the default is ~/.ansible/oui.bin or $ANSIBLE_OUI_TABLE.
+    '''
+    if not valid_mac_address(mac):
+        return None
+
+    try:
+        return lookup(mac, table)
+    except (IOError, OSError, ValueError) as e:
+        raise AnsibleFilterError('Could not read the OUI table: %s' % e, orig_exc=e) from e
+
+
+class FilterModule(object):
+    ''' network related filters '''
+
+    def filters(self):
+        return {
+            'ip_classify': ip_classify,
+            'network_cache_info': network_cache_info,
+            # compile a list of networks once for in_network/in_any_network, ie hosts | select('in_any_network', nets | network_index)
+            'network_index': network_index,
+            'oui_vendor': oui_vendor,
+        }
@@ -4,51 +4,440 @@
 from __future__ import absolute_import, division, print_function
 __metaclass__ = type
 
+import bisect
 import difflib
+import hashlib
+import json
+import mmap
 import os
+import re
 
-from collections.abc import Sequence
+from collections import Counter, OrderedDict
+from collections.abc import Mapping, Sequence
 
 from ansible.errors import AnsibleError, AnsibleFilterError
-from ansible.module_utils._text import to_bytes, to_text
+from ansible.module_utils._text import to_bytes
 from ansible.module_utils.six import string_types
 
 
-def do_diff(a, b, fromfile='', tofile='', n=3, lineterm='\n'):
+DIFF_ALGORITHMS = ('difflib', 'myers', 'patience')
+# edit steps the middle snake search can take before it stops looking for the shortest diff
+DIFF_MIN_COST = 256
+
+
+def _line_ids(a, b):
+    ''' map lines to integers, equal lines get the same one, so the diff only compares integers '''
+    ids = {}
+    return [ids.setdefault(line, len(ids)) for line in a], [ids.setdefault(line, len(ids)) for line in b]
+
+
+def _trim(a, b, a_lo, a_hi, b_lo, b_hi, blocks):
+    ''' record the common head and tail of the ranges as matches, returns what is left in between '''
+    start = a_lo
+    while a_lo < a_hi and b_lo < b_hi and a[a_lo] == b[b_lo]:
+        a_lo += 1
+        b_lo += 1
+    if a_lo > start:
+        blocks.append((start, b_lo - (a_lo - start), a_lo - start))
+
+    end = a_hi
+    while a_lo < a_hi and b_lo < b_hi and a[a_hi - 1] == b[b_hi - 1]:
+        a_hi -= 1
+        b_hi -= 1
+    if a_hi < end:
+        blocks.append((a_hi, b_hi, end - a_hi))
+
+    return a_lo, a_hi, b_lo, b_hi
+
+
+def _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi):
+    '''
+    Myers' middle snake, searching from both ends at once until the paths overlap, needs space linear in the edit distance.
+    Returns the start and end of the snake, relative to a_lo and b_lo.
+    Like xdiff, once the search gets too expensive it settles for splitting at the furthest forward path, the diff is then
+    not always the shortest, but large inputs with many changes do not turn quadratic.
+    '''
+    n = a_hi - a_lo
+    m = b_hi - b_lo
+    delta = n - m
+    odd = delta & 1
+    max_d = (n + m + 1) // 2
+    offset = max_d + 1
+    forward = [0] * (2 * max_d + 3)
+    backward = [0] * (2 * max_d + 3)
+    max_cost = max(DIFF_MIN_COST, int((n + m) ** 0.5))
+
+    for d in range(max_d + 1):
+        if d > max_cost:
+            # furthest point of the paths so far that lies inside the ranges and splits them
+            candidates = [(2 * forward[offset + k] - k, k) for k in range(-d + 1, d, 2)
+                          if 0 <= forward[offset + k] <= n and 0 <= forward[offset + k] - k <= m]
+            candidates = [c for c in candidates if 0 < c[0] < n + m]
+            if candidates:
+                x = forward[offset + max(candidates)[1]]
+                y = x - max(candidates)[1]
+                return x, y, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_lo + x] == b[b_lo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if odd and -(d - 1) <= delta - k <= d - 1 and x + backward[offset + delta - k] >= n:
+                return x0, y0, x, y
+
+        # the backward search runs on the reversed ranges
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[offset + k - 1] < backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[a_hi - 1 - x] == b[b_hi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if not odd and -d <= delta - k <= d and x + forward[offset + delta - k] >= n:
+                return n - x, m - y, n - x0, m - y0
+
+    raise AssertionError('no middle snake found')
+
+
+def _myers_blocks(a, b, a_lo, a_hi, b_lo, b_hi, blocks):
+    ''' matching blocks of a shortest edit script, splitting on the middle snake '''
+    ranges = [(a_lo, a_hi, b_lo, b_hi)]
+    while ranges:
+        a_lo, a_hi, b_lo, b_hi = _trim(a, b, *ranges.pop(), blocks=blocks)
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        x0, y0, x, y = _middle_snake(a, b, a_lo, a_hi, b_lo, b_hi)
+        if x > x0:
+            blocks.append((a_lo + x0, b_lo + y0, x - x0))
+        ranges.append((a_lo, a_lo + x0, b_lo, b_lo + y0))
+        ranges.append((a_lo + x, a_hi, b_lo + y, b_hi))
+
+
+def _patience_blocks(a, b, a_lo, a_hi, b_lo, b_hi, blocks):
+    '''
+    Anchor on the longest increasing run of lines that appear exactly once on both sides and diff between anchors,
+    ranges without such lines fall back to myers.
+    '''
+    ranges = [(a_lo, a_hi, b_lo, b_hi)]
+    while ranges:
+        a_lo, a_hi, b_lo, b_hi = _trim(a, b, *ranges.pop(), blocks=blocks)
+        if a_lo == a_hi or b_lo == b_hi:
+            continue
+
+        a_count = Counter(a[a_lo:a_hi])
+        b_count = Counter(b[b_lo:b_hi])
+        b_unique = dict((line, j) for j, line in enumerate(b[b_lo:b_hi], b_lo) if b_count[line] == 1)
+        pairs = [(i, b_unique[line]) for i, line in enumerate(a[a_lo:a_hi], a_lo) if a_count[line] == 1 and line in b_unique]
+        if not pairs:
+            _myers_blocks(a, b, a_lo, a_hi, b_lo, b_hi, blocks)
+            continue
+
+        # patience sorting for the longest increasing subsequence of b positions
+        tails = []
+        tails_idx = []
+        previous = [None] * len(pairs)
+        for idx, (i, j) in enumerate(pairs):
+            k = bisect.bisect_left(tails, j)
+            if k == len(tails):
+                tails.append(j)
+                tails_idx.append(idx)
+            else:
+                tails[k] = j
+                tails_idx[k] = idx
+            previous[idx] = tails_idx[k - 1] if k else None
+
+        anchors = []
+        idx = tails_idx[-1]
+        while idx is not None:
+            anchors.append(pairs[idx])
+            idx = previous[idx]
+        anchors.reverse()
+
+        i_prev, j_prev = a_lo, b_lo
+        for i, j in anchors:
+            blocks.append((i, j, 1))
+            ranges.append((i_prev, i, j_prev, j))
+            i_prev, j_prev = i + 1, j + 1
+        ranges.append((i_prev, a_hi, j_prev, b_hi))
+
+
+def _opcodes(blocks, n, m):
+    ''' same as difflib.SequenceMatcher.get_opcodes, from the matching blocks '''
+    merged = []
+    for i, j, size in sorted(blocks):
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            merged[-1][2] += size
+        else:
+            merged.append([i, j, size])
+    merged.append([n, m, 0])
+
+    i = j = 0
+    codes = []
+    for ai, bj, size in merged:
+        if i < ai and j < bj:
+            codes.append(('replace', i, ai, j, bj))
+        elif i < ai:
+            codes.append(('delete', i, ai, j, bj))
+        elif j < bj:
+            codes.append(('insert', i, ai, j, bj))
+        i, j = ai + size, bj + size
+        if size:
+            codes.append(('equal', ai, i, bj, j))
+    return codes
+
+
+def _grouped_opcodes(codes, n):
+    ''' same as difflib.SequenceMatcher.get_grouped_opcodes '''
+    if not codes:
+        codes = [('equal', 0, 1, 0, 1)]
+    if codes[0][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[0]
+        codes[0] = tag, max(i1, i2 - n), i2, max(j1, j2 - n), j2
+    if codes[-1][0] == 'equal':
+        tag, i1, i2, j1, j2 = codes[-1]
+        codes[-1] = tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)
+
+    group = []
+    for tag, i1, i2, j1, j2 in codes:
+        if tag == 'equal' and i2 - i1 > n + n:
+            group.append((tag, i1, min(i2, i1 + n), j1, min(j2, j1 + n)))
+            yield group
+            group = []
+            i1, j1 = max(i1, i2 - n), max(j1, j2 - n)
+        group.append((tag, i1, i2, j1, j2))
+    if group and not (len(group) == 1 and group[0][0] == 'equal'):
+        yield group
+
+
+def _unified_range(start, stop):
+
+    beginning = start + 1
+    length = stop - start
+    if length == 1:
+        return '%d' % beginning
+    if not length:
+        beginning -= 1
+    return '%d,%d' % (beginning, length)
+
+
+def unified_diff(a, b, fromfile='', tofile='', n=3, lineterm='\n', algorithm='myers'):
+    ''' difflib.unified_diff output, computed with one of our own algorithms on lines mapped to integers '''
+    a_ids, b_ids = _line_ids(a, b)
+    blocks = []
+    if algorithm == 'patience':
+        _patience_blocks(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), blocks)
+    else:
+        _myers_blocks(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), blocks)
+    del a_ids, b_ids
+
+    started = False
+    for group in _grouped_opcodes(_opcodes(blocks, len(a), len(b)), n):
+        if not started:
+            started = True
+            yield '--- %s%s' % (fromfile, lineterm)
+            yield '+++ %s%s' % (tofile, lineterm)
+
+        first, last = group[0], group[-1]
+        yield '@@ -%s +%s @@%s' % (_unified_range(first[1], last[2]), _unified_range(first[3], last[4]), lineterm)
+        for tag, i1, i2, j1, j2 in group:
+            if tag == 'equal':
+                for line in a[i1:i2]:
+                    yield ' ' + line
+                continue
+            if tag in ('replace', 'delete'):
+                for line in a[i1:i2]:
+                    yield '-' + line
+            if tag in ('replace', 'insert'):
+                for line in b[j1:j2]:
+                    yield '+' + line
+
+
+# rendered diffs, keyed on the content of both sides and the options, the oldest go first
+DIFF_CACHE_SIZE = 128
+_diffs = OrderedDict()
+
+
+def _read_file(path):
+    ''' text and (size, digest) of a file, hashed and decoded straight from a read only map '''
+    with open(to_bytes(path, errors='surrogate_or_strict'), 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        if not size:
+            # empty files cannot be mapped
+            return '', (0, hashlib.sha1().hexdigest())
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            # same as to_text(..., errors='surrogate_or_strict') without copying the bytes first
+            return str(mapped, 'utf-8', 'surrogateescape'), (size, hashlib.sha1(mapped).hexdigest())
+
+
+def do_diff(a, b, fromfile='', tofile='', n=3, lineterm='\n', algorithm='difflib'):
 
     def _get_diff_param(x, filename):
+        ''' the content and a (size, digest) key, files and strings with the same text get the same key '''
 
-        filename = filename
-        if os.path.exists(x):
+        if isinstance(x, string_types) and os.path.exists(x):
             if not filename:
                 filename = x
             try:
-                with open(to_bytes(a), 'rb') as f:
-                    b_content = f.read()
-                    x = to_text(b_content, errors='surrogate_or_strict')
-            except TypeError as e:
-                raise AnsibleError('failed to convert text from "%s"' % (x), orig_exc=e)
-            except (IOError, OSError) as e:
+                x, key = _read_file(x)
+            except (IOError, OSError, ValueError) as e:
                 raise AnsibleError('failed to open: %s' % x, orig_exc=e)
+            return x, filename, key
 
         if isinstance(x, string_types):
-            x = x.split(lineterm)
+            b_x = to_bytes(x, errors='surrogate_or_strict')
+            key = (len(b_x), hashlib.sha1(b_x).hexdigest())
         elif not isinstance(x, Sequence):
             raise TypeError('i want file, stirng or list of strings!!!')
         else:
             bad = [y for y in x if not isinstance(y, string_types)]
             if bad:
                 raise TypeError('you gave me a list with stuff that is not a string!')
+            # lists never share a key with strings, lines could contain lineterm
+            digest = hashlib.sha1(b'list')
+            for y in x:
+                digest.update(to_bytes(y, errors='surrogate_or_strict'))
+                digest.update(b'\0')
+            key = (len(x), digest.hexdigest())
 
-        return x, filename
+        return x, filename, key
+
+    if algorithm not in DIFF_ALGORITHMS:
+        raise AnsibleFilterError('algorithm must be one of %s, got %s' % (', '.join(DIFF_ALGORITHMS), algorithm))
 
     try:
-        a, fromfile = _get_diff_param(a)
-        b, tofile = _get_diff_param(b)
-        return lineterm.join(difflib.unified_diff(a, b, fromfile, tofile, n=n, lineterm=lineterm))
+        a, fromfile, a_key = _get_diff_param(a, fromfile)
+        b, tofile, b_key = _get_diff_param(b, tofile)
+        if a_key == b_key:
+            return ''
+
+        key = (a_key, b_key, n, lineterm, fromfile, tofile, algorithm)
+        if key in _diffs:
+            _diffs.move_to_end(key)
+            return _diffs[key]
+
+        if isinstance(a, string_types):
+            a = a.split(lineterm)
+        if isinstance(b, string_types):
+            b = b.split(lineterm)
+        if algorithm == 'difflib':
+            diff = lineterm.join(difflib.unified_diff(a, b, fromfile, tofile, n=n, lineterm=lineterm))
+        else:
+            diff = lineterm.join(unified_diff(a, b, fromfile, tofile, n=n, lineterm=lineterm, algorithm=algorithm))
     except Exception as e:
         raise AnsibleFilterError('bad diff', orig_exc=e)
 
+    _diffs[key] = diff
+    if len(_diffs) > DIFF_CACHE_SIZE:
+        _diffs.popitem(last=False)
+    return diff
+
+
+IDENTIFIER = re.compile(r'^[A-Za-z_][A-Za-z0-9_]*$')
+
+
+def _path(path, key):
+    ''' jq like paths, .key for plain keys, [0] for list items and ["some key"] for anything else '''
+    if isinstance(key, int) and not isinstance(key, bool):
+        return '%s[%d]' % (path, key)
+    if isinstance(key, string_types) and IDENTIFIER.match(key):
+        return '%s.%s' % (path, key)
+    return '%s[%s]' % (path, json.dumps(key) if isinstance(key, string_types) else repr(key))
+
+
+def _fingerprint(value):
+    ''' equal values get equal fingerprints, so list items can be aligned like lines '''
+    try:
+        return json.dumps(value, sort_keys=True, default=repr)
+    except (TypeError, ValueError):
+        # mixed key types do not sort
+        return repr(value)
+
+
+def _data_diff(a, b, path, changes):
+
+    if a is b:
+        return
+
+    if isinstance(a, Mapping) and isinstance(b, Mapping):
+        if a == b:
+            return
+        for key in a:
+            if key not in b:
+                changes.append({'path': _path(path, key), 'change': 'removed', 'old': a[key]})
+            else:
+                _data_diff(a[key], b[key], _path(path, key), changes)
+        for key in b:
+            if key not in a:
+                changes.append({'path': _path(path, key), 'change': 'added', 'new': b[key]})
+
+    elif isinstance(a, Sequence) and isinstance(b, Sequence) and not isinstance(a, string_types) and not isinstance(b, string_types):
+        if a == b:
+            return
+        # align the items like diff aligns lines, so an insert does not show up as everything after it changing
+        a_ids, b_ids = _line_ids([_fingerprint(x) for x in a], [_fingerprint(x) for x in b])
+        blocks = []
+        _myers_blocks(a_ids, b_ids, 0, len(a_ids), 0, len(b_ids), blocks)
+        for tag, i1, i2, j1, j2 in _opcodes(blocks, len(a), len(b)):
+            if tag == 'equal':
+                continue
+            # replaced items are compared in place, so changes inside them keep their path
+            common = min(i2 - i1, j2 - j1) if tag == 'replace' else 0
+            for offset in range(common):
+                _data_diff(a[i1 + offset], b[j1 + offset], _path(path, j1 + offset), changes)
+            for i in range(i1 + common, i2):
+                changes.append({'path': _path(path, i), 'change': 'removed', 'old': a[i]})
+            for j in range(j1 + common, j2):
+                changes.append({'path': _path(path, j), 'change': 'added', 'new': b[j]})
+
+    elif a != b:
+        changes.append({'path': path, 'change': 'changed', 'old': a, 'new': b})
+
+
+def _dump(value):
+    return json.dumps(value, indent=2, sort_keys=True, default=repr).split('\n')
+
+
+def data_diff(a, b, unified=False, fromfile='', tofile=''):
+    '''
+    Compare two data structures directly, without serializing them, skipping identical parts.
+    Returns the list of changes, each with the path, the change (added, removed or changed) and the old and new values.
+    With unified, a text view of those changes is returned instead, in the style of the diff filter.
+    Removed list items have their index in a, added and changed ones their index in b.
+    Values python considers equal, like 1 and true, are not a change.
+    '''
+    changes = []
+    try:
+        _data_diff(a, b, '', changes)
+    except RecursionError as e:
+        raise AnsibleFilterError('data too deeply nested to diff', orig_exc=e) from e
+
+    if not unified:
+        return changes
+
+    if not changes:
+        return ''
+
+    lines = ['--- %s' % fromfile, '+++ %s' % tofile]
+    for change in changes:
+        lines.append('@@ %s %s @@' % (change['path'] or '.', change['change']))
+        if 'old' in change:
+            lines.extend('-' + line for line in _dump(change['old']))
+        if 'new' in change:
+            lines.extend('+' + line for line in _dump(change['new']))
+    return '\n'.join(lines)
+
 
 class FilterModule(object):
     ''' Ansible core jinja2 filters '''
@@ -56,4 +445,5 @@ class FilterModule(object):
     def filters(self):
         return {
             'diff': do_diff,
+            'data_diff': data_diff,
         }
@@ -87,15 +87,15 @@ class InventoryModule(BaseInventoryPlugin, Constructable):
         for host in hosts:
             hostvars = self.inventory.get_host(host).get_vars()
             if compose:
-                self._set_composite_vars(compose, hostvars[host], host, strict=strict)
+                self._set_composite_vars(compose, hostvars, host, strict=strict)
 
             if groups:
                 # constructed groups based on conditionals
-                self._add_host_to_composed_groups(groups, hostvars[host], host, strict=strict)
+                self._add_host_to_composed_groups(groups, hostvars, host, strict=strict)
 
             if keyed:
                 # constructed keyed_groups
-                self._add_host_to_keyed_groups(keyed, hostvars[host], host, strict=strict)
+                self._add_host_to_keyed_groups(keyed, hostvars, host, strict=strict)
 
     def process(self, hosts):
 
@@ -31,8 +31,63 @@ options:
     legacy:
         description: Enable facter 'legacy' formated facts
         type: bool
+    cache_ttl:
+        description:
+            - Seconds to reuse the output of a previous facter run on the target, 0 disables the cache.
+            - The cache is per set of options and facter version, it is also discarded when anything under I(fact_path) changes.
+        type: int
+        default: 0
+    cache_dir:
+        description: Directory on the target where cached facter output is kept.
+        type: path
+        default: ~/.ansible/facter_cache
+    native:
+        description:
+            - Answer queries for core facts (C(os), C(processors), C(memory) and C(networking.interfaces) and anything under them)
+              from C(/proc), C(/sys) and C(os-release) without running facter, using the same structure facter does.
+            - Only the queries that cannot be answered this way are passed to facter, if none are left facter is not run at all.
+            - Requires I(query), a full fact gathering always runs facter. Custom facts overriding these core facts are ignored.
+        type: bool
+        default: false
+    include:
+        description:
+            - Only return the facts under these dotted paths, pruned on the target before they are sent back.
+            - Each path segment can use shell style wildcards, list items are matched by their index, for example C(networking.interfaces.*.ip).
+            - When using I(query) the top level keys are the query names, which are split on dots like any other path.
+        type: list
+        elements: str
+    exclude:
+        description:
+            - Remove the facts under these dotted paths before they are sent back, for example C(mountpoints) or C(disks.loop*).
+            - Same syntax as I(include), applied after it.
+        type: list
+        elements: str
+    delta:
+        description:
+            - Only send back the top level facts that changed since the last run, the full C(facter) fact is rebuilt on the controller
+              from the facts it already has for the host, so this is most useful with a fact cache.
+            - A digest of each top level fact is kept in I(cache_dir) on the target, per set of options, with a generation id
+              that is returned as the C(facter_generation) fact.
+            - When the controller does not have the generation the target knows about, for example on the first run or when the fact cache
+              expired, all facts are sent back.
+            - Runs without I(delta) reset C(facter_generation), as the C(facter) fact they return is not the one the generation describes.
+        type: bool
+        default: false
+    delta_generation:
+        description:
+            - Generation of the facts the controller has, set by the action plugin from the C(facter_generation) fact, there should be no need to set it.
+        type: str
+    timing:
+        description:
+            - Run facter with timing enabled and return how long each fact took to resolve as C(facter_timing), slowest first,
+              with the total time the facter process took.
+            - Useful to find the custom facts in I(fact_path) that slow down fact gathering. Facter always runs, I(cache_ttl) is ignored.
+            - Facts answered by I(native) collection do not show up in the timing.
+        type: bool
+        default: false
 description:
     - Gatheres facts provided by the 'facter' utility
+    - The I(delta) option relies on the action plugin and cannot be used when calling the module directly.
 extends_documentation_fragment:
   -  action_common_attributes
   -  action_common_attributes.facts
@@ -62,11 +117,72 @@ EXAMPLES = r"""
 
 # Collect a few specific facts
 #> ansible all -m facter_facts -a 'query=os.name,os.release.major,processors.isa'
+
+ - name: Core facts without starting facter (or ruby)
+   facter_facts:
+     query: os.name,processors.count,memory.system.total_bytes
+     native: true
+
+ - name: Only interface addresses, without the rest of the networking facts
+   facter_facts:
+     include:
+       - networking.interfaces.*.ip
+       - networking.interfaces.*.ip6
+     exclude:
+       - networking.interfaces.lo
+
+ - name: Only run facter once an hour
+   facter_facts:
+     load_puppet: true
+     cache_ttl: 3600
+
+ - name: Only transfer the facts that changed since the last run, best with a fact cache
+   facter_facts:
+     delta: true
+
+ - name: Find out which facts make facter slow
+   facter_facts:
+     timing: true
+   register: facter_run
+
+ - debug:
+     msg: "{{ facter_run.facter_timing.facts[:5] }}"
+"""
+
+RETURN = r"""
+cached:
+    description: Whether the facts came from the cache instead of running facter.
+    returned: always
+    type: bool
+    sample: true
+facter_timing:
+    description:
+        - Time spent by facter, with the time each fact took to resolve, slowest first, in seconds.
+        - Facts that resolve more than once, like some custom facts, have their times added up.
+    returned: when I(timing) is true and facter ran
+    type: dict
+    sample: {"total": 1.874, "facts": [{"name": "my_slow_fact", "seconds": 1.52}, {"name": "networking", "seconds": 0.031}]}
+facter_delta:
+    description:
+        - What the module sent back when using I(delta), the action plugin removes it after merging it into the C(facter) fact.
+        - Contains the C(generation) of the facts, the C(base) generation they were compared to, C(full) when all facts were sent,
+          the C(changed) top level facts and the names of the C(removed) ones.
+    returned: never, only between the module and the action plugin
+    type: dict
 """
 
+import fcntl
+import fnmatch
+import hashlib
+import ipaddress
 import json
+import os
+import re
+import socket
+import struct
+import time
 
-from ansible.module_utils._text import to_text
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.basic import AnsibleModule
 
 
@@ -83,16 +199,144 @@ def find_facter(module):
 
 def run_facter(module, facter_path, options):
 
-    run = [facter_path, "--json", options]
+    run = [facter_path, "--json"] + options
     rc, out, err = module.run_command(run)
     return rc, out, err
 
 
-def get_facter_output(module):
+def fact_path_fingerprint(path):
+    ''' digest of the names, sizes and mtimes of everything under path, so any change to custom facts is noticed '''
+    digest = hashlib.sha1()
+    if path and os.path.isdir(path):
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                filename = os.path.join(root, name)
+                try:
+                    st = os.stat(filename)
+                except OSError:
+                    continue
+                digest.update(to_bytes('%s\0%d\0%d\n' % (filename, st.st_size, st.st_mtime_ns), errors='surrogate_or_strict'))
+    return digest.hexdigest()
+
+
+def cache_file(module, facter_path, options):
+    ''' where the output for this facter binary, version and options is cached '''
+    rc, version, err = module.run_command([facter_path, '--version'])
+    key = json.dumps([facter_path, version.strip(), options])
+    return os.path.join(module.params['cache_dir'], hashlib.sha1(to_bytes(key, errors='surrogate_or_strict')).hexdigest())
+
+
+def read_cache(module, path, fingerprint):
+
+    try:
+        with open(path) as f:
+            cached = json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+    if time.time() - cached.get('time', 0) > module.params['cache_ttl'] or cached.get('fact_path') != fingerprint:
+        return None
+
+    return cached.get('output')
+
+
+def write_cache(module, path, fingerprint, out):
+
+    try:
+        if not os.path.isdir(module.params['cache_dir']):
+            os.makedirs(module.params['cache_dir'], 0o700)
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'time': time.time(), 'fact_path': fingerprint, 'output': out}, f)
+        os.rename(path + '.tmp', path)
+    except (IOError, OSError) as e:
+        module.warn('Could not write facter cache %s: %s' % (path, to_text(e)))
+
+
+def fact_hashes(facts):
+    ''' digest of each top level fact, the generation is the digest of all of them so unchanged facts keep it '''
+    hashes = dict((key, hashlib.sha1(to_bytes(json.dumps(value, sort_keys=True), errors='surrogate_or_strict')).hexdigest())
+                  for key, value in facts.items())
+    return hashes, hashlib.sha1(to_bytes(json.dumps(hashes, sort_keys=True))).hexdigest()
+
+
+def delta_file(module):
+    ''' the delta state is per set of options, as they change what the facts look like '''
+    options = dict((k, v) for k, v in module.params.items() if k not in ('delta_generation', 'cache_ttl'))
+    key = json.dumps(options, sort_keys=True)
+    return os.path.join(module.params['cache_dir'], 'delta-%s' % hashlib.sha1(to_bytes(key, errors='surrogate_or_strict')).hexdigest())
+
+
+def delta(module, facts):
+    '''
+    Compare facts with the hashes kept from the last run, returns only the top level facts that changed and the ones removed.
+    If the controller does not have the generation the hashes belong to, everything is returned as changed.
+    '''
+    path = delta_file(module)
+    hashes, generation = fact_hashes(facts)
+
+    try:
+        with open(path) as f:
+            state = json.load(f)
+    except (IOError, OSError, ValueError):
+        state = {}
+
+    result = {'generation': generation, 'base': module.params['delta_generation'], 'full': True, 'changed': facts, 'removed': []}
+    if state.get('generation') and state.get('generation') == module.params['delta_generation']:
+        old = state.get('hashes', {})
+        result['full'] = False
+        result['changed'] = dict((key, value) for key, value in facts.items() if old.get(key) != hashes[key])
+        result['removed'] = sorted(key for key in old if key not in hashes)
+
+    if not module.check_mode and state.get('generation') != generation:
+        try:
+            if not os.path.isdir(module.params['cache_dir']):
+                os.makedirs(module.params['cache_dir'], 0o700)
+            with open(path + '.tmp', 'w') as f:
+                json.dump({'generation': generation, 'hashes': hashes}, f)
+            os.rename(path + '.tmp', path)
+        except (IOError, OSError) as e:
+            module.warn('Could not write facter delta state %s: %s' % (path, to_text(e)))
+
+    return result
+
+
+# facter 4 prints "fact 'os.name', took: 0.000123 seconds" on stdout, the value can be in parentheses and ruby prints
+# small floats like 1.2e-05. Older versions say "in" and can use ms.
+TIMING_LINE = re.compile(r'''fact\s+['"]?(?P<name>[^'"\s,]+)['"]?.*?\b(?:took|in):?\s*\(?(?P<value>\d+(?:\.\d+)?(?:e[-+]?\d+)?)\)?\s*(?P<unit>ms|milliseconds?|s|seconds?)\b''', re.I)
+JSON_START = re.compile(r'^\{', re.M)
+
+
+def parse_timing(output):
+    ''' seconds spent on each fact, added up if it shows up more than once, slowest first '''
+    facts = {}
+    for line in output.splitlines():
+        match = TIMING_LINE.search(line)
+        if match:
+            seconds = float(match.group('value'))
+            if match.group('unit').lower().startswith('m'):
+                seconds /= 1000
+            facts[match.group('name')] = facts.get(match.group('name'), 0) + seconds
+    return [{'name': name, 'seconds': round(seconds, 6)} for name, seconds in sorted(facts.items(), key=lambda x: (-x[1], x[0]))]
+
+
+def strip_timing(out):
+    ''' only keep the JSON document, timing and debug lines can surround it '''
+    start = JSON_START.search(out)
+    if start is None:
+        return out
+    try:
+        end = json.JSONDecoder().raw_decode(out, start.start())[1]
+    except ValueError:
+        return out
+    return out[start.start():end]
+
+
+def get_facter_output(module, query, timing=None):
 
     facter_path = find_facter(module)
     if not facter_path:
-        return None
+        return None, False
 
     options = []
     if module.params['fact_path']:
@@ -107,35 +351,379 @@ def get_facter_output(module):
     if module.params['legacy']:
         options.append("--show-legacy")
 
-    if module.debug:
+    if module._debug:
         options.append("-t")
         options.append("-d")
+    elif timing is not None:
+        options.append("-t")
+
+    if query:
+        options.extend(query)
 
-    if module.params['query']:
-        options.append(' '.join(module.params['query']))
+    use_cache = module.params['cache_ttl'] > 0 and not module._debug and timing is None
+    if use_cache:
+        cached = cache_file(module, facter_path, options)
+        fingerprint = fact_path_fingerprint(module.params['fact_path'])
+        out = read_cache(module, cached, fingerprint)
+        if out is not None:
+            return out, True
 
+    start = time.time()
     rc, out, err = run_facter(module, facter_path, options)
+    if timing is not None:
+        timing['total'] = round(time.time() - start, 6)
+        timing['facts'] = parse_timing(out + '\n' + err)
 
     if rc != 0:
+        return None, False
+
+    if "-t" in options:
+        out = strip_timing(out)
+
+    if use_cache and not module.check_mode:
+        write_cache(module, cached, fingerprint, out)
+
+    return out, False
+
+
+def _read(path, default=None):
+
+    try:
+        with open(path) as f:
+            return f.read().strip()
+    except (IOError, OSError):
+        return default
+
+
+def _human(num):
+    ''' format a byte count the way facter does '''
+    for unit in ('bytes', 'KiB', 'MiB', 'GiB', 'TiB', 'PiB'):
+        if num < 1024 or unit == 'PiB':
+            break
+        num /= 1024.0
+    if unit == 'bytes':
+        return '%d bytes' % num
+    return '%.2f %s' % (num, unit)
+
+
+def native_os():
+
+    release = {}
+    for path in ('/etc/os-release', '/usr/lib/os-release'):
+        data = _read(path)
+        if data is not None:
+            for line in data.splitlines():
+                if '=' in line and not line.startswith('#'):
+                    k, v = line.split('=', 1)
+                    release[k.strip()] = v.strip().strip('"\'')
+            break
+
+    distro_id = release.get('ID', '').lower()
+    like = release.get('ID_LIKE', '').lower().split() + [distro_id]
+    name = NATIVE_OS_NAMES.get(distro_id, release.get('NAME', os.uname()[0]).split()[0])
+    if 'debian' in like:
+        family = 'Debian'
+    elif [x for x in ('rhel', 'fedora', 'centos') if x in like]:
+        family = 'RedHat'
+    elif [x for x in ('suse', 'sles') if x in like]:
+        family = 'Suse'
+    else:
+        family = name
+
+    version = release.get('VERSION_ID', '')
+    parts = version.split('.')
+    rel = {'full': version, 'major': parts[0]}
+    if len(parts) > 1:
+        rel['minor'] = parts[1]
+
+    hardware = os.uname()[4]
+    architecture = hardware
+    if family == 'Debian':
+        architecture = {'x86_64': 'amd64', 'aarch64': 'arm64'}.get(hardware, hardware)
+
+    facts = {
+        'name': name,
+        'family': family,
+        'hardware': hardware,
+        'architecture': architecture,
+        'release': rel,
+        'distro': {
+            'id': name,
+            'description': release.get('PRETTY_NAME', ''),
+            'release': rel,
+        },
+        'selinux': {'enabled': os.path.exists('/sys/fs/selinux/enforce')},
+    }
+    if release.get('VERSION_CODENAME'):
+        facts['distro']['codename'] = release['VERSION_CODENAME']
+    return facts
+
+
+def native_processors():
+
+    models = []
+    physical = set()
+    mhz = None
+    for line in (_read('/proc/cpuinfo', '')).splitlines():
+        key, sep, value = line.partition(':')
+        key, value = key.strip(), value.strip()
+        if key == 'model name':
+            models.append(value)
+        elif key == 'physical id':
+            physical.add(value)
+        elif key == 'cpu MHz' and mhz is None:
+            mhz = float(value)
+
+    facts = {
+        'count': os.sysconf('SC_NPROCESSORS_ONLN'),
+        'physicalcount': len(physical) or 1,
+        'models': models,
+        'isa': os.uname()[4],
+    }
+    khz = _read('/sys/devices/system/cpu/cpu0/cpufreq/cpuinfo_max_freq')
+    if khz is not None:
+        mhz = int(khz) / 1000.0
+    if mhz is not None:
+        facts['speed'] = '%.2f GHz' % (mhz / 1000) if mhz >= 1000 else '%.2f MHz' % mhz
+    return facts
+
+
+def native_memory():
+
+    info = {}
+    for line in (_read('/proc/meminfo', '')).splitlines():
+        key, sep, value = line.partition(':')
+        info[key] = int(value.split()[0]) * 1024
+
+    def usage(total, available):
+        used = total - available
+        return {
+            'total': _human(total),
+            'total_bytes': total,
+            'available': _human(available),
+            'available_bytes': available,
+            'used': _human(used),
+            'used_bytes': used,
+            'capacity': '%.2f%%' % (100.0 * used / total if total else 0),
+        }
+
+    facts = {'system': usage(info.get('MemTotal', 0), info.get('MemAvailable', info.get('MemFree', 0)))}
+    if info.get('SwapTotal'):
+        facts['swap'] = usage(info['SwapTotal'], info.get('SwapFree', 0))
+    return facts
+
+
+def _ioctl_addr(sock, request, ifname):
+
+    try:
+        res = fcntl.ioctl(sock.fileno(), request, struct.pack('256s', to_bytes(ifname[:15])))
+    except (IOError, OSError):
         return None
+    return socket.inet_ntoa(res[20:24])
+
 
-    return out
+def native_interfaces():
 
+    interfaces = {}
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        for ifname in sorted(os.listdir('/sys/class/net')):
+            base = os.path.join('/sys/class/net', ifname)
+            iface = {}
+            mtu = _read(os.path.join(base, 'mtu'))
+            if mtu is not None:
+                iface['mtu'] = int(mtu)
+            mac = _read(os.path.join(base, 'address'))
+            if mac and mac != '00:00:00:00:00:00':
+                iface['mac'] = mac
+
+            address = _ioctl_addr(sock, SIOCGIFADDR, ifname)
+            if address is not None:
+                netmask = _ioctl_addr(sock, SIOCGIFNETMASK, ifname)
+                network = str(ipaddress.ip_interface(u'%s/%s' % (address, netmask)).network.network_address)
+                iface['bindings'] = [{'address': address, 'netmask': netmask, 'network': network}]
+                iface.update({'ip': address, 'netmask': netmask, 'network': network})
+            interfaces[ifname] = iface
+    finally:
+        sock.close()
+
+    # address, index, prefix length, scope, flags, name
+    for line in (_read('/proc/net/if_inet6', '')).splitlines():
+        fields = line.split()
+        if len(fields) != 6 or fields[5] not in interfaces:
+            continue
+        iface = ipaddress.ip_interface(u'%s/%d' % (':'.join(fields[0][i:i + 4] for i in range(0, 32, 4)), int(fields[2], 16)))
+        binding = {'address': str(iface.ip), 'netmask': str(iface.netmask), 'network': str(iface.network.network_address)}
+        facts = interfaces[fields[5]]
+        facts.setdefault('bindings6', []).append(binding)
+        if 'ip6' not in facts:
+            facts.update({'ip6': binding['address'], 'netmask6': binding['netmask'], 'network6': binding['network']})
+
+    return interfaces
+
+
+def _lookup(data, query):
+    ''' follow a dotted facter query into data, raises KeyError if it is not there '''
+    for key in query.split('.'):
+        if isinstance(data, list):
+            try:
+                data = data[int(key)]
+            except (ValueError, IndexError):
+                raise KeyError(query)
+        elif isinstance(data, dict):
+            data = data[key]
+        else:
+            raise KeyError(query)
+    return data
+
+
+def native_facts(query):
+    '''
+    Answer the queries we can from /proc, /sys and os-release in the same shape facter would,
+    returns a dict keyed on the answered queries like facter does for queries.
+    '''
+    document = {}
+    answers = {}
+    for q in query:
+        for root in NATIVE_COLLECTORS:
+            if q == root or q.startswith(root + '.'):
+                break
+        else:
+            continue
 
-def collect(module):
+        try:
+            if root not in document:
+                value = NATIVE_COLLECTORS[root]()
+                target = document
+                parts = root.split('.')
+                for part in parts[:-1]:
+                    target = target.setdefault(part, {})
+                target[parts[-1]] = value
+            answers[q] = _lookup(document, q)
+        except (KeyError, IOError, OSError, ValueError):
+            continue
+
+    return answers
+
+
+def collect(module, timing=None):
 
     facter_dict = {}
-    facter_output = get_facter_output(module)
+    cached = False
+    # each key is its own argument, the default is a single empty one
+    query = [q for q in module.params['query'] or [] if q]
+
+    # only what native collection cannot answer goes to facter
+    native = {}
+    if module.params['native'] and query:
+        native = native_facts(query)
+        query = [q for q in query if q not in native]
+        if not query:
+            return native, False
+
+    facter_output, cached = get_facter_output(module, query, timing)
 
     if facter_output is not None:
         try:
             facter_dict = json.loads(facter_output)
         except json.JSONDecodeError as e:
             module.fail_json(msg=to_text(e))
+        facter_dict.update(native)
+    elif native:
+        facter_dict = native
     else:
         facter_dict = {'failed': 'no facter output available'}
 
-    return facter_dict
+    return facter_dict, cached
+
+
+# map os-release ID to what facter calls the OS
+NATIVE_OS_NAMES = {
+    'almalinux': 'AlmaLinux',
+    'amzn': 'Amazon',
+    'centos': 'CentOS',
+    'debian': 'Debian',
+    'fedora': 'Fedora',
+    'ol': 'OracleLinux',
+    'opensuse-leap': 'openSUSE',
+    'rhel': 'RedHat',
+    'rocky': 'Rocky',
+    'sles': 'SLES',
+    'ubuntu': 'Ubuntu',
+}
+
+SIOCGIFADDR = 0x8915
+SIOCGIFNETMASK = 0x891b
+
+# facts that native collection can produce and how
+NATIVE_COLLECTORS = {
+    'os': native_os,
+    'processors': native_processors,
+    'memory': native_memory,
+    'networking.interfaces': native_interfaces,
+}
+
+
+def _advance(patterns, key):
+    '''
+    Match key (which can be dotted, like query names) against the start of each pattern.
+    Returns whether any pattern is fully matched and the rest of the partially matched ones.
+    '''
+    segments = key.split('.')
+    full = False
+    rest = []
+    for pattern in patterns:
+        if all(fnmatch.fnmatchcase(seg, pat) for seg, pat in zip(segments, pattern)):
+            if len(pattern) <= len(segments):
+                full = True
+            else:
+                rest.append(pattern[len(segments):])
+    return full, rest
+
+
+def prune(data, include=None, exclude=None):
+    '''
+    Return a copy of data with only the paths matching include (None means everything) and none matching exclude.
+    Patterns are lists of path segments, which can use shell style wildcards, list items are matched by index.
+    '''
+    if isinstance(data, dict):
+        items = data.items()
+        pruned = {}
+    elif isinstance(data, list):
+        items = ((str(idx), value) for idx, value in enumerate(data))
+        pruned = []
+    else:
+        return data
+
+    for key, value in items:
+        inc = None
+        if include is not None:
+            full, inc = _advance(include, key)
+            if full:
+                inc = None
+            elif not inc:
+                continue
+
+        exc = []
+        if exclude:
+            full, exc = _advance(exclude, key)
+            if full:
+                continue
+
+        if inc is not None or exc:
+            if inc is not None and not isinstance(value, (dict, list)):
+                # wanted something below a leaf
+                continue
+            value = prune(value, inc, exc)
+            if inc is not None and not value:
+                continue
+
+        if isinstance(pruned, dict):
+            pruned[key] = value
+        else:
+            pruned.append(value)
+
+    return pruned
 
 
 def main():
@@ -146,16 +734,41 @@ def main():
             load_ruby=dict(required=False, type='bool', default=True),
             load_puppet=dict(required=False, type='bool'),
             legacy=dict(required=False, type='bool'),
+            cache_ttl=dict(required=False, type='int', default=0),
+            cache_dir=dict(required=False, type='path', default='~/.ansible/facter_cache'),
+            native=dict(required=False, type='bool', default=False),
+            include=dict(required=False, type='list', elements='str'),
+            exclude=dict(required=False, type='list', elements='str'),
+            delta=dict(required=False, type='bool', default=False),
+            delta_generation=dict(required=False, type='str'),
+            timing=dict(required=False, type='bool', default=False),
         ),
         supports_check_mode=True,
     )
 
-    facts = {'ansible_facts': {'facter': {}}}
+    facts = {'ansible_facts': {'facter': {}}, 'cached': False}
+    timing = None
+    if module.params['timing']:
+        timing = facts['facter_timing'] = {'total': 0.0, 'facts': []}
+
     try:
-        facts['ansible_facts']['facter'] = collect(module)
+        facts['ansible_facts']['facter'], facts['cached'] = collect(module, timing)
     except Exception as e:
         module.fail_json(msg=to_text(e))
 
+    # trim here so only what was asked for is sent back
+    include = module.params['include']
+    exclude = module.params['exclude']
+    if include is not None or exclude:
+        facts['ansible_facts']['facter'] = prune(facts['ansible_facts']['facter'],
+                                                 include and [p.split('.') for p in include],
+                                                 exclude and [p.split('.') for p in exclude])
+
+    # the action plugin rebuilds the full facts on the controller
+    if module.params['delta']:
+        facts['facter_delta'] = delta(module, facts['ansible_facts'].pop('facter'))
+        facts['ansible_facts']['facter_generation'] = facts['facter_delta']['generation']
+
     module.exit_json(**facts)
 
 
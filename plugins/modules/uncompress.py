@@ -20,13 +20,27 @@ options:
       - If copy=yes (default), local path to compressed file to copy to the target server; can be absolute or relative.
       - If copy=no, path on the target server to existing compressed file to unpack.
       - If copy=no and src contains ://, the remote machine will download the file from the url first.
-    required: true
+      - Required unless I(items) is used.
+    required: false
     default: null
   dest:
     description:
       - Remote absolute path where the file should be uncompressed.
-    required: true
+      - Required with I(src).
+    required: false
     default: null
+  items:
+    description:
+      - List of dictionaries with C(src) and C(dest) keys, same meaning as the options above, to uncompress many files in one task.
+      - All archives are transferred at once and the module runs a single time, uncompressing up to I(batch_workers) of them at the same time.
+      - All other options apply to every item. Mutually exclusive with I(src).
+    required: false
+    default: null
+  batch_workers:
+    description:
+      - "Number of I(items) uncompressed at the same time."
+    required: false
+    default: 4
   copy:
     description:
       - "If true, the file is copied from local 'master' to the target machine, otherwise, the plugin will look for src file at the target machine."
@@ -39,11 +53,65 @@ options:
     required: false
     choices: [ "yes", "no" ]
     default: "no"
+  download_dir:
+    description:
+      - "Directory on the target where downloads (copy=no and src is an url) are kept until the file has been uncompressed."
+      - "An interrupted download is resumed from here on the next run using HTTP Range requests, as long as the server reports the same ETag or Last-Modified for the url.
+        A finished download that could not be uncompressed is used again as is. Servers that reject HEAD requests are asked for the first byte of the url instead."
+    required: false
+    default: "~/.ansible/uncompress/downloads"
+  download_parallel:
+    description:
+      - "Number of ranged requests used to fetch a download in parallel, only used when the server reports its size and support for byte ranges."
+    required: false
+    default: 1
+  workers:
+    description:
+      - "Number of threads used to uncompress gzip and bzip2 files made of many independent members/streams, like the ones created by pigz or pbzip2."
+      - "Use 0 to match the number of CPUs on the target, files that cannot be split are uncompressed by a single thread."
+    required: false
+    default: 1
+  buffer_size:
+    description:
+      - "Size in bytes of the buffer used when uncompressing, it is allocated once and reused for every read."
+      - "Does not apply to I(xz) files, which are uncompressed by the C(xz) command."
+    required: false
+    default: 65536
+  sparse:
+    description:
+      - "If true, runs of zeros (in 64k blocks) in the uncompressed data are left as holes in the output file instead of being written, useful for disk images."
+      - "The output is written to a temporary directory next to I(dest), so it is renamed into place and keeps its holes."
+      - "Does not apply to I(xz) files, which are uncompressed by the C(xz) command."
+    required: false
+    choices: [ "yes", "no" ]
+    default: "no"
+  metrics:
+    description:
+      - "If true, return byte counts and per phase timings (detect, download, decompress, compare, move and, when the file was copied, transfer) in C(metrics)."
+    required: false
+    choices: [ "yes", "no" ]
+    default: "no"
+  archive_cache:
+    description:
+      - "Directory on the target where archives copied from the controller (copy=yes) are kept, named after their checksum."
+      - "When the archive is already there the transfer is skipped. Nothing is removed from this directory automatically."
+    required: false
+    default: null
+  manifest:
+    description:
+      - "If true, a small manifest (C(.<dest name>.uncompress)) recording the archive checksum, the output checksum and stat is kept next to I(dest)."
+      - "With copy=yes the action plugin reads it with a single remote command and, if the archive, file arguments and the stat of I(dest) are unchanged,
+        returns without transferring the archive or running the module. Any drift in the stat of I(dest) falls back to the full path."
+    required: false
+    choices: [ "yes", "no" ]
+    default: "no"
 author: "Jonathan Mainguy (@Jmainguy)"
 notes:
     - requires C(file)/C(xz) commands on target host
     - requires gzip and bzip python modules
-    - can handle I(gzip), I(bzip2) and I(xz) compressed files
+    - can handle I(gzip), I(bzip2), I(xz), I(zstd) and I(lz4) compressed files
+    - I(zstd) uses the python 3.14+ C(compression.zstd) module when present, the C(zstandard) library otherwise
+    - I(lz4) requires the C(lz4) library
     - detects type of compressed file automatically
 '''
 
@@ -57,6 +125,20 @@ EXAMPLES = '''
 
 - name: Uncompress a file that needs to be downloaded
   uncompress: src=https://example.com/example.bz2 dest=/usr/local/bin/example copy=no
+
+- name: Uncompress foo.gz, skipping the transfer if the same foo.gz was copied before
+  uncompress: src=foo.gz dest=/tmp/foo archive_cache=/var/cache/uncompress
+
+- name: Uncompress several files in one go
+  uncompress:
+    items:
+      - src: foo.gz
+        dest: /tmp/foo
+      - src: bar.xz
+        dest: /tmp/bar
+
+- name: Download a big file in 4 parallel chunks, resuming if a previous attempt failed
+  uncompress: src=https://example.com/image.xz dest=/srv/images/image copy=no download_parallel=4
 '''
 
 
@@ -66,6 +148,31 @@ changed:
     returned: always
     type: boolean
     sample: True
+transfer_skipped:
+    description: Whether the archive was found in C(archive_cache) and not transferred again.
+    returned: when copy=yes
+    type: boolean
+    sample: True
+manifest_matched:
+    description: Whether the manifest showed I(dest) was up to date, in which case nothing else was done.
+    returned: when manifest=yes, copy=yes and I(dest) is up to date
+    type: boolean
+    sample: True
+results:
+    description: One result per entry in I(items), each with C(dest), C(changed) and, as applicable, C(failed), C(msg),
+                 C(transfer_skipped), C(manifest_matched) and C(metrics).
+    returned: when items is used
+    type: list
+    sample: [{"dest": "/tmp/foo", "changed": true}, {"dest": "/tmp/bar", "changed": false}]
+metrics:
+    description: Sizes and time spent in each phase, C(mb_per_second) is the throughput of each phase over the data it handled.
+    returned: when metrics=yes
+    type: dict
+    sample: {
+        "compressed_bytes": 1048576, "uncompressed_bytes": 5242880, "ratio": 5.0,
+        "seconds": {"transfer": 0.5, "detect": 0.004, "decompress": 0.25, "compare": 0.0, "move": 0.001},
+        "mb_per_second": {"transfer": 2.0, "detect": 250.0, "decompress": 20.0, "move": 5000.0}
+    }
 '''
 
 import os
@@ -73,86 +180,528 @@ import shutil
 import gzip
 import bz2
 import filecmp
-from ansible.module_utils.basic import AnsibleModule
+import hashlib
+import io
+import json
+import mmap
+import re
+import subprocess
+import tempfile
+import time
+import traceback
+import zlib
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ansible.module_utils._text import to_bytes, to_text
 from ansible.module_utils.urls import fetch_url
-from ansible.module_utils.pycompat24 import get_exception
 
+ZSTD_IMP_ERR = None
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+        ZSTD_IMP_ERR = traceback.format_exc()
+
+LZ4_IMP_ERR = None
+try:
+    import lz4.frame
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+    LZ4_IMP_ERR = traceback.format_exc()
 
 # When downloading an archive, how much of the archive to download before
 # saving to a tempfile (64k)
 BUFSIZE = 65536
 
+# Unit for the throughput metrics
+MB = 1048576
+
+# Size of the buffer used when uncompressing (64k), larger buffers did not help with the stdlib decompressors
+BUFFER_SIZE = 65536
+
+# Granularity at which runs of zeros are turned into holes when writing sparse files (64k)
+SPARSE_BLOCK = 65536
+ZERO_BLOCK = bytes(SPARSE_BLOCK)
+
+# Name of the file holding the validators for a partial download
+META_FILE = 'meta.json'
 
-def ungzip(src, dest):
+
+class UncompressError(Exception):
+    pass
+
+
+def _remote_info(module, url):
     """
-    Uncompress gzip files.
+    Ask the server for the size, validators and range support of url, an empty dict means we know nothing.
+    Servers that reject HEAD, like presigned object store urls, are asked for the first byte with a GET instead.
     """
+    rsp, info = fetch_url(module, url, method='HEAD')
+    if info['status'] == 200:
+        length = info.get('content-length')
+        ranges = 'bytes' in info.get('accept-ranges', '')
+    else:
+        rsp, info = fetch_url(module, url, headers={'Range': 'bytes=0-0'})
+        if rsp is not None:
+            rsp.close()
+        if info['status'] == 206:
+            # bytes 0-0/<total>
+            length = info.get('content-range', '').rpartition('/')[2]
+            ranges = True
+        elif info['status'] == 200:
+            # the range was ignored, so we would have to get the whole file every time
+            length = info.get('content-length')
+            ranges = False
+        else:
+            return {}
+
     try:
-        f_out = open(dest, 'wb')
-        f_in = gzip.open(src, 'rb')
+        length = int(length)
+    except (TypeError, ValueError):
+        length = -1
+
+    return dict(
+        length=length,
+        validator=info.get('etag') or info.get('last-modified'),
+        ranges=ranges,
+    )
+
+
+def _fetch_range(module, url, path, start, end, validator, partial_only=False):
+    """
+    Append bytes start-end (end inclusive, None for 'until the end') of url to path, which must already hold start bytes.
+    If the server ignores the range (or the validator no longer matches) it sends the whole file, in which case
+    we start over unless we only asked for a chunk of it.
+    """
+    headers = {}
+    if start or end is not None:
+        headers['Range'] = 'bytes=%d-%s' % (start, '' if end is None else end)
+        if validator:
+            headers['If-Range'] = validator
+
+    rsp, info = fetch_url(module, url, headers=headers)
+    if info['status'] == 206:
+        mode = 'ab'
+    elif info['status'] == 200 and not partial_only:
+        mode = 'wb'
+    else:
+        raise Exception("unexpected response for %s (%s): %s" % (url, headers.get('Range', 'full'), info.get('msg')))
+
+    f = open(path, mode)
+    try:
+        while True:
+            data = rsp.read(BUFSIZE)
+            if not data:
+                break  # End of file, break while loop
+            f.write(data)
+    finally:
+        f.close()
+
+
+def _chunks(length, parallel):
+    """
+    Split length bytes into parallel (start, end) ranges, end inclusive.
+    """
+    size = -(-length // parallel)
+    return [(start, min(start + size, length) - 1) for start in range(0, length, size)]
+
+
+def download(module, url, download_dir, parallel=1):
+    """
+    Download url into download_dir and return the path to it.
+    Partial downloads are kept under a directory named after the url, so a failed download can be resumed
+    with ranged requests on the next run as long as the ETag (or Last-Modified) reported by the server has not changed.
+    The finished download stays there until it has been uncompressed, so a later failure does not mean fetching it again.
+    """
+    workdir = os.path.join(download_dir, hashlib.sha1(to_bytes(url)).hexdigest())
+    package = os.path.join(workdir, os.path.basename(url.split('?', 1)[0].rstrip('/')) or 'download')
+    meta_path = os.path.join(workdir, META_FILE)
+
+    info = _remote_info(module, url)
+    validator = info.get('validator')
+    length = info.get('length', -1)
+
+    meta = {}
+    if os.path.exists(meta_path):
         try:
-            shutil.copyfileobj(f_in, f_out)
+            f = open(meta_path)
+            try:
+                meta = json.load(f)
+            finally:
+                f.close()
+        except ValueError:
+            meta = {}
+
+    # we can only reuse what we have if we know the server still has the same thing
+    if not validator or meta.get('validator') != validator or meta.get('length') != length:
+        shutil.rmtree(workdir, ignore_errors=True)
+    elif os.path.exists(package) and (length < 0 or os.path.getsize(package) == length):
+        return package
+    if not os.path.isdir(workdir):
+        os.makedirs(workdir)
+
+    f = open(meta_path, 'w')
+    try:
+        json.dump(dict(url=url, validator=validator, length=length), f)
+    finally:
+        f.close()
+
+    part = package + '.part'
+    if parallel > 1 and info.get('ranges') and length > 0:
+        chunks = _chunks(length, parallel)
+
+        def fetch_chunk(idx):
+            start, end = chunks[idx]
+            chunk = '%s.%d' % (part, idx)
+            if not os.path.exists(chunk):
+                open(chunk, 'wb').close()
+            have = os.path.getsize(chunk)
+            if start + have <= end:
+                _fetch_range(module, url, chunk, start + have, end, validator, partial_only=True)
+            return chunk
+
+        pool = ThreadPoolExecutor(max_workers=parallel)
+        try:
+            parts = list(pool.map(fetch_chunk, range(len(chunks))))
         finally:
-            f_out.close()
-            f_in.close()
-        msg = ""
-    except Exception:
-        e = get_exception()
-        f_out.close()
+            pool.shutdown()
+
+        f = open(part, 'wb')
+        try:
+            for chunk in parts:
+                c = open(chunk, 'rb')
+                try:
+                    shutil.copyfileobj(c, f, BUFSIZE)
+                finally:
+                    c.close()
+        finally:
+            f.close()
+        for chunk in parts:
+            os.remove(chunk)
+    else:
+        if not os.path.exists(part):
+            open(part, 'wb').close()
+        have = os.path.getsize(part)
+        if length < 0 or have < length:
+            _fetch_range(module, url, part, have, None, validator)
+
+    if length >= 0 and os.path.getsize(part) != length:
+        raise Exception("expected %d bytes but got %d" % (length, os.path.getsize(part)))
+
+    os.rename(part, package)
+    return package
+
+
+# Start of a gzip member (magic + deflate + flags without the reserved bits) and of a bzip2 stream
+# (magic + block size + first block magic), used to find where independent members start in files made by pigz/pbzip2 and the like.
+GZIP_MEMBER = re.compile(b'\x1f\x8b\x08[\x00-\x1f]')
+BZIP2_STREAM = re.compile(b'BZh[1-9]1AY&SY')
+
+# Smallest amount of compressed data worth handing to a worker
+MIN_SEGMENT = 1048576
+
+# Largest amount of compressed data handed to a worker, and of uncompressed data it keeps before the output catches up (8M),
+# so the segments in flight bound the memory used whatever the size of the file
+MAX_SEGMENT = 8388608
+
+# Largest run of segments merged together when a member start turns out to be a false match, past that we give up on splitting
+MAX_MERGED = 4 * MAX_SEGMENT
+
+# How much of a candidate member is inflated to tell a real member start from the magic turning up inside compressed data
+PROBE_SIZE = 4096
+
+# Exceptions meaning a segment did not end at a member boundary
+SEGMENT_ERRORS = (IOError, OSError, EOFError, zlib.error)
+
+
+def _member_starts_at(mm, pos, decompressor):
+    """
+    Whether the start of a member found at pos is believable, a false match in compressed data almost always fails to inflate.
+    """
+    try:
+        decompressor().decompress(mm[pos:pos + PROBE_SIZE])
+    except SEGMENT_ERRORS:
+        return False
+    return True
+
+
+def _segments(mm, member, decompressor, workers):
+    """
+    Split the mmaped file into (start, end) segments that start on something that looks like the start of a member.
+    One of these can still be a false match inside compressed data, _parallel_uncompress then merges the segments around it.
+    """
+    size = min(max(len(mm) // (workers * 4), MIN_SEGMENT), MAX_SEGMENT)
+    starts = [0]
+    for target in range(size, len(mm), size):
+        if target <= starts[-1]:
+            continue
+        for found in member.finditer(mm, target, min(target + size, len(mm))):
+            if _member_starts_at(mm, found.start(), decompressor):
+                starts.append(found.start())
+                break
+    return list(zip(starts, starts[1:] + [len(mm)]))
+
+
+def _segment_chunks(data, decompressor):
+    """
+    Uncompress all the members in data, MAX_SEGMENT bytes at most at a time.
+    Raises EOFError unless data ends exactly at the end of a member.
+    """
+    while data:
+        d = decompressor()
+        yield d.decompress(data, MAX_SEGMENT)
+        while not d.eof:
+            # bz2 keeps the input it did not get to, zlib hands it back
+            if getattr(d, 'needs_input', False):
+                raise EOFError('segment ends inside a member')
+            tail = getattr(d, 'unconsumed_tail', b'')
+            chunk = d.decompress(tail, MAX_SEGMENT)
+            if not chunk and not tail:
+                raise EOFError('segment ends inside a member')
+            yield chunk
+        data = d.unused_data
+        # allow for the zero padding some tools leave at the end of the file
+        if not data.strip(b'\0'):
+            break
+
+
+def _uncompress_segment(data, decompressor):
+    """
+    Start uncompressing data, returns the first MAX_SEGMENT or so bytes of output and the generator for the rest,
+    which the writer drains itself, so a segment that inflates a lot does not sit in memory whole.
+    Returns None unless data ends exactly at the end of a member.
+    """
+    chunks = _segment_chunks(data, decompressor)
+    out = []
+    size = 0
+    try:
+        for chunk in chunks:
+            out.append(chunk)
+            size += len(chunk)
+            if size >= MAX_SEGMENT:
+                return out, chunks
+    except SEGMENT_ERRORS:
+        return None
+    return out, None
+
+
+def _parallel_uncompress(src, f_out, member, decompressor, workers, sparse=False):
+    """
+    Uncompress src into f_out by splitting it at member boundaries and uncompressing the pieces in a thread pool,
+    zlib and bz2 release the GIL while they work. Output is written in order.
+    Returns False if the file could not be split, the caller must then fall back to the single threaded path.
+    """
+    f_in = open(src, 'rb')
+    try:
+        if os.fstat(f_in.fileno()).st_size < 2 * MIN_SEGMENT:
+            return False
+        mm = mmap.mmap(f_in.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
         f_in.close()
-        msg = "%s" % e
 
-    return msg
+    pool = ThreadPoolExecutor(max_workers=workers)
+    try:
+        segments = _segments(mm, member, decompressor, workers)
+        # members much larger than a segment cannot be split, nor held in memory
+        if len(segments) < 2 or max(end - start for start, end in segments) > 2 * MAX_SEGMENT:
+            return False
+
+        spans = iter(segments)
+        pending = deque()
+
+        def write(done):
+            """ write a segment, False if it did not end at a member boundary """
+            if done is None:
+                return False
+            out, rest = done
+            for data in out:
+                _write_block(f_out, data, len(data), sparse)
+            while rest is not None:
+                try:
+                    data = next(rest)
+                except StopIteration:
+                    break
+                except SEGMENT_ERRORS:
+                    return False
+                _write_block(f_out, data, len(data), sparse)
+            return True
+
+        def flush(limit):
+            while len(pending) > limit:
+                future, start, end = pending.popleft()
+                done = future.result()
+                mark = f_out.tell()
+                while not write(done):
+                    # the next segment started on a false match, so this one ends inside a member: redo it with the next one merged in
+                    f_out.seek(mark)
+                    f_out.truncate()
+                    if pending:
+                        future, dummy, end = pending.popleft()
+                        future.cancel()
+                    else:
+                        span = next(spans, None)
+                        if span is None:
+                            return False
+                        end = span[1]
+                    if end - start > MAX_MERGED:
+                        return False
+                    done = _uncompress_segment(mm[start:end], decompressor)
+            return True
+
+        for start, end in spans:
+            pending.append((pool.submit(_uncompress_segment, mm[start:end], decompressor), start, end))
+            # keep a bounded amount of uncompressed data in memory
+            if not flush(workers * 2):
+                break
+        else:
+            if flush(0):
+                if sparse:
+                    f_out.truncate()
+                return True
+
+        # the file is not what it looked like, throw away the partial output
+        for future, start, end in pending:
+            future.cancel()
+        f_out.seek(0)
+        f_out.truncate()
+        return False
+    finally:
+        pool.shutdown()
+        mm.close()
+
+
+def _write_block(f_out, buf, n, sparse):
+    """
+    Write the first n bytes of buf to f_out, if sparse, blocks of zeros are seeked over instead of written.
+    """
+    view = memoryview(buf)
+    if not sparse:
+        f_out.write(view[:n])
+        return
+
+    data = 0
+    for pos in range(0, n, SPARSE_BLOCK):
+        end = min(pos + SPARSE_BLOCK, n)
+        if buf.startswith(ZERO_BLOCK[:end - pos], pos):
+            if data < pos:
+                f_out.write(view[data:pos])
+            f_out.seek(end - pos, os.SEEK_CUR)
+            data = end
+    if data < n:
+        f_out.write(view[data:n])
+
+
+def copystream(f_in, f_out, bufsize=BUFFER_SIZE, sparse=False):
+    """
+    Copy f_in into f_out reading into a single preallocated buffer, unlike shutil.copyfileobj this does not
+    create a new bytes object per read.
+    Readers without their own readinto (gzip, lz4) would only emulate it with a read() and a copy, those are just read.
+    """
+    if type(f_in).readinto is io.BufferedIOBase.readinto:
+        while True:
+            data = f_in.read(bufsize)
+            if not data:
+                break
+            _write_block(f_out, data, len(data), sparse)
+    else:
+        buf = bytearray(bufsize)
+        while True:
+            n = f_in.readinto(buf)
+            if not n:
+                break
+            _write_block(f_out, buf, n, sparse)
 
+    # the file might end in a hole, make sure it has the right size
+    if sparse:
+        f_out.truncate()
 
-def unbzip(src, dest):
+
+def _uncompress_stream(opener, src, dest, bufsize=BUFFER_SIZE, sparse=False, split=None, workers=1):
     """
-    Uncompress bzip files.
+    Uncompress src into dest using the file like object returned by opener(src).
+    split is a (member regex, decompressor factory) pair for formats that can be uncompressed in parallel.
     """
     try:
         f_out = open(dest, 'wb')
-        f_in = bz2.BZ2File(src, 'rb')
         try:
-            shutil.copyfileobj(f_in, f_out)
+            if split is None or workers < 2 or not _parallel_uncompress(src, f_out, split[0], split[1], workers, sparse):
+                f_in = opener(src)
+                try:
+                    copystream(f_in, f_out, bufsize, sparse)
+                finally:
+                    f_in.close()
         finally:
             f_out.close()
-            f_in.close()
         msg = ""
-    except Exception:
-        e = get_exception()
-        f_out.close()
-        f_in.close()
+    except Exception as e:
         msg = "%s" % e
 
     return msg
 
 
+def ungzip(src, dest, workers=1, bufsize=BUFFER_SIZE, sparse=False):
+    """
+    Uncompress gzip files.
+    """
+    return _uncompress_stream(lambda path: gzip.open(path, 'rb'), src, dest, bufsize, sparse,
+                              split=(GZIP_MEMBER, lambda: zlib.decompressobj(31)), workers=workers)
+
+
+def unbzip(src, dest, workers=1, bufsize=BUFFER_SIZE, sparse=False):
+    """
+    Uncompress bzip files.
+    """
+    return _uncompress_stream(lambda path: bz2.BZ2File(path, 'rb'), src, dest, bufsize, sparse,
+                              split=(BZIP2_STREAM, bz2.BZ2Decompressor), workers=workers)
+
+
+def unzstd(src, dest, bufsize=BUFFER_SIZE, sparse=False):
+    """
+    Uncompress zstd files, all frames are uncompressed.
+    """
+    if zstd is not None:
+        opener = lambda path: zstd.open(path, 'rb')
+    else:
+        opener = lambda path: zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), read_across_frames=True)
+
+    return _uncompress_stream(opener, src, dest, bufsize, sparse)
+
+
+def unlz4(src, dest, bufsize=BUFFER_SIZE, sparse=False):
+    """
+    Uncompress lz4 (frame format) files.
+    """
+    return _uncompress_stream(lambda path: lz4.frame.open(path, 'rb'), src, dest, bufsize, sparse)
+
+
 def unxzip(module, src, dest):
     """
-    Uncompress xz files. Since we must support python 2.4 (EL 5) we cannot import lzma and use native python.
-    We guess the filename of the output. .xz and .lzma get stripped, .txz and .lzma get replaced with .tar
+    Uncompress xz files with the xz command, straight into dest, so nothing is left next to src
+    and items of a batch that share a directory do not collide.
+    Failures raise UncompressError, as this runs in the batch workers.
     """
     cmd_path = module.get_bin_path('xz')
-    cmd = '%s -k -d %s' % (cmd_path, src)
-    # Guess filename of output
-    prefix, suffix = os.path.splitext(src)
-    if (suffix == '.xz') or (suffix == '.lzma'):
-        ufile = prefix
-    elif (suffix == '.txz') or (suffix == '.tlz'):
-        ufile = prefix + '.tar'
-    else:
-        module.fail_json(msg="xz does not understand suffix %s" % suffix)
+    if cmd_path is None:
+        raise UncompressError("Could not find the xz command to uncompress %s" % src)
     try:
-        module.run_command(cmd)
-        if not os.path.isfile(ufile):
-            module.fail_json(msg="%s should have uncompressed to %s, but alas it did not" % (src, ufile))
-        shutil.move(ufile, dest)
-        msg = ""
-    except Exception:
-        e = get_exception()
-        msg = "%s" % e
+        f_out = open(dest, 'wb')
+        try:
+            proc = subprocess.Popen([cmd_path, '-d', '-c', src], stdout=f_out, stderr=subprocess.PIPE)
+            err = proc.communicate()[1]
+        finally:
+            f_out.close()
+    except (IOError, OSError) as e:
+        raise UncompressError("Could not uncompress %s with xz: %s" % (src, e))
+    if proc.returncode != 0:
+        raise UncompressError("xz could not uncompress %s: %s" % (src, to_text(err).strip()))
 
-    return msg
+    return ""
 
 
 def filetype(module, src):
@@ -166,11 +715,15 @@ def filetype(module, src):
     return ftype
 
 
-def copyfile(src, dest, deep_check):
+def copyfile(src, dest, deep_check, timings=None):
     """
     Copy file from tempsrc to final destination. Unless its already at dest, and the same as tempsrc.
+    Time spent comparing and moving is added to timings, if given.
     """
+    if timings is None:
+        timings = {}
     changed = False
+    start = time.time()
     if os.path.isfile(dest):
         # This takes a long time
         if deep_check:
@@ -183,110 +736,278 @@ def copyfile(src, dest, deep_check):
                 nodiff = False
             else:
                 nodiff = True
+        timings['compare'] = time.time() - start
         # If there is a difference, then we change the destination
         if nodiff is False:
+            start = time.time()
             shutil.move(src, dest)
+            timings['move'] = time.time() - start
             changed = True
     # If the destination file does not exist, then place it.
     else:
         shutil.move(src, dest)
+        timings['move'] = time.time() - start
         changed = True
 
     return changed
 
 
-def main():
-    module = AnsibleModule(
-        # not checking because of daisy chain to file module
-        argument_spec=dict(
-            src=dict(required=True),
-            dest=dict(required=True),
-            copy=dict(default=True, type='bool'),
-            original_basename=dict(required=False),  # used to handle 'dest is a directory' via template, a slight hack
-            deep_check=dict(default=False, type='bool'),  # This check takes a long time if dest already exists.
-        ),
-        add_file_common_args=True,
+def archive_cache_path(archive_cache, checksum, basename):
+    """
+    Where a transferred archive is kept in the archive cache, must match what the action plugin looks for.
+    """
+    return os.path.join(archive_cache, '%s-%s' % (checksum, basename))
+
+
+def manifest_path(dest):
+    """
+    The manifest kept next to dest, must match what the action plugin reads.
+    """
+    dname, fname = os.path.split(dest)
+    return os.path.join(dname, '.%s.uncompress' % fname)
+
+
+def write_manifest(module, dest, archive_checksum):
+    """
+    Record which archive and file arguments produced dest and what dest looked like afterwards,
+    the action plugin uses this to skip the transfer and the module when nothing changed.
+    """
+    st = os.stat(dest)
+    manifest = dict(
+        checksum=archive_checksum,
+        output_checksum=module.sha1(dest),
+        args=module.params['manifest_args'],
+        stat=[st.st_size, st.st_mtime_ns, st.st_ino, st.st_mode, st.st_uid, st.st_gid],
+    )
+    path = manifest_path(dest)
+    f = open(path + '.tmp', 'w')
+    try:
+        json.dump(manifest, f)
+    finally:
+        f.close()
+    os.rename(path + '.tmp', path)
+
+
+def build_metrics(compressed, uncompressed, timings):
+    """
+    Put together the metrics returned with metrics=yes, throughput is in MB/s of the data each phase worked on.
+    """
+    processed = dict(download=compressed, detect=compressed, decompress=uncompressed, compare=uncompressed, move=uncompressed)
+    return dict(
+        compressed_bytes=compressed,
+        uncompressed_bytes=uncompressed,
+        ratio=round(float(uncompressed) / compressed, 3),
+        seconds=dict((phase, round(timings[phase], 6)) for phase in timings),
+        mb_per_second=dict((phase, round(processed[phase] / MB / timings[phase], 3)) for phase in timings if timings[phase] > 0),
     )
 
-    src = os.path.expanduser(module.params['src'])
-    dest = os.path.expanduser(module.params['dest'])
+
+def uncompress(module, src, dest, tempdir, checksum=None, original_basename=None):
+    """
+    Uncompress src into dest (one item when working on a batch), returns the result for it.
+    Failures raise UncompressError so batches can report them per item.
+    """
+    src = os.path.expanduser(src)
+    dest = os.path.expanduser(dest)
     copy = module.params['copy']
     deep_check = module.params['deep_check']
-    file_args = module.load_file_common_arguments(module.params)
-    tempdir = os.path.dirname(__file__)
+    download_dir = module.params['download_dir']
+    download_parallel = max(module.params['download_parallel'], 1)
+    downloaded = False
+    # more threads than CPUs only adds contention
+    cpus = os.cpu_count() or 1
+    workers = min(module.params['workers'] or cpus, cpus)
+    bufsize = max(module.params['buffer_size'], 4096)
+    sparse = module.params['sparse']
+    timings = {}
+    # dest differs per item
+    file_args = module.load_file_common_arguments(dict(module.params, dest=dest))
     fdir, ffile = os.path.split(dest)
 
+    # is dest OK to receive tar file? checked first, so we do not download something we cannot use
+    if not os.path.isdir(fdir):
+        raise UncompressError("Destination '%s' is not a directory" % dest)
+
+    if os.path.isdir(dest):
+        raise UncompressError("Destination '%s' is an existing directory, must be a file, consider using unarchive module for archives" % dest)
+
     # did tar file arrive?
     if not os.path.exists(src):
         if copy:
-            module.fail_json(msg="Source '%s' failed to transfer" % src)
-        # If copy=false, and src= contains ://, try and download the file to a temp directory.
+            raise UncompressError("Source '%s' failed to transfer" % src)
+        # If copy=false, and src= contains ://, try and download the file to the download directory.
         elif '://' in src:
-            package = os.path.join(tempdir, str(src.rsplit('/', 1)[1]))
             try:
-                rsp, info = fetch_url(module, src)
-                f = open(package, 'w')
-                # Read 1kb at a time to save on ram
-                while True:
-                    data = rsp.read(BUFSIZE)
-
-                    if data == "":
-                        break  # End of file, break while loop
-
-                    f.write(data)
-                f.close()
-                src = package
-            except Exception:
-                e = get_exception()
-                f.close()
-                module.fail_json(msg="Failure downloading %s, %s" % (src, e))
+                start = time.time()
+                src = download(module, src, download_dir, download_parallel)
+                timings['download'] = time.time() - start
+                downloaded = True
+            except Exception as e:
+                raise UncompressError("Failure downloading %s, %s" % (src, e))
         else:
-            module.fail_json(msg="Source '%s' does not exist" % src)
+            raise UncompressError("Source '%s' does not exist" % src)
 
     # skip working with 0 size archives
     try:
-        if os.path.getsize(src) == 0:
-            module.fail_json(msg="Invalid archive '%s', the file is 0 bytes" % src)
+        size = os.path.getsize(src)
     except Exception:
-        module.fail_json(msg="Source '%s' not readable" % src)
-
-    # is dest OK to receive tar file?
-    if not os.path.isdir(fdir):
-        module.fail_json(msg="Destination '%s' is not a directory" % dest)
+        raise UncompressError("Source '%s' not readable" % src)
+    if size == 0:
+        raise UncompressError("Invalid archive '%s', the file is 0 bytes" % src)
 
     if not os.access(src, os.R_OK):
-        module.fail_json(msg="Source '%s' not readable" % src)
+        raise UncompressError("Source '%s' not readable" % src)
 
-    if os.path.isdir(dest):
-        module.fail_json(msg="Destination '%s' is an existing directory, must be a file, consider using unarchive module for archives" % dest)
+    # Sparse output is written next to dest, as moving it from another filesystem would copy it and fill in the holes.
+    if sparse:
+        try:
+            tempdir = tempfile.mkdtemp(dir=fdir, prefix='.%s.' % ffile)
+        except (IOError, OSError) as e:
+            raise UncompressError("Could not create a temporary directory next to '%s': %s" % (dest, e))
 
     # Full path to the uncompressed file in the temp directory.
     tempsrc = os.path.join(tempdir, ffile)
 
-    # Check what kind of compressed file the src is.
-    ftype = filetype(module, src)[1]
-    if "gzip" in ftype:
-        msg = ungzip(src, tempsrc)
-    elif "x-bzip2" in ftype:
-        msg = unbzip(src, tempsrc)
-    elif "x-xz" in ftype:
-        msg = unxzip(module, src, tempsrc)
-    else:
-        module.fail_json(msg="Filetype not supported by uncompress module. %s" % ftype)
-    if msg != "":
-        module.fail_json(msg=msg)
-    # If file already exists at dest, compare uncompressed file and dest, and replace if different.
-    changed = copyfile(tempsrc, dest, deep_check)
+    try:
+        # Check what kind of compressed file the src is.
+        start = time.time()
+        ftype = filetype(module, src)[1]
+        timings['detect'] = time.time() - start
+        start = time.time()
+        if "gzip" in ftype:
+            msg = ungzip(src, tempsrc, workers, bufsize, sparse)
+        elif "x-bzip2" in ftype:
+            msg = unbzip(src, tempsrc, workers, bufsize, sparse)
+        elif "x-xz" in ftype:
+            msg = unxzip(module, src, tempsrc)
+        elif "zstd" in ftype:
+            if zstd is None and zstandard is None:
+                raise UncompressError("%s\n%s" % (missing_required_lib('zstandard'), ZSTD_IMP_ERR))
+            msg = unzstd(src, tempsrc, bufsize, sparse)
+        elif "lz4" in ftype:
+            if not HAS_LZ4:
+                raise UncompressError("%s\n%s" % (missing_required_lib('lz4'), LZ4_IMP_ERR))
+            msg = unlz4(src, tempsrc, bufsize, sparse)
+        else:
+            raise UncompressError("Filetype not supported by uncompress module. %s" % ftype)
+        if msg != "":
+            raise UncompressError(msg)
+        timings['decompress'] = time.time() - start
+        compressed = os.path.getsize(src)
+        uncompressed = os.path.getsize(tempsrc)
+
+        # If file already exists at dest, compare uncompressed file and dest, and replace if different.
+        changed = copyfile(tempsrc, dest, deep_check, timings)
+    finally:
+        if sparse:
+            shutil.rmtree(tempdir, ignore_errors=True)
+
+    # checksum the archive before it moves (or goes away with the download)
+    if module.params['manifest']:
+        archive_checksum = checksum or module.sha1(src)
+
+    # the download is only kept around to resume it
+    if downloaded:
+        shutil.rmtree(os.path.dirname(src), ignore_errors=True)
+
+    # keep the transferred archive so the next run can skip the transfer
+    if copy and module.params['archive_cache'] and checksum:
+        cached_src = archive_cache_path(module.params['archive_cache'], checksum, original_basename or os.path.basename(src))
+        if src != cached_src:
+            try:
+                if not os.path.isdir(module.params['archive_cache']):
+                    os.makedirs(module.params['archive_cache'])
+                shutil.move(src, cached_src)
+            except (IOError, OSError) as e:
+                module.warn("Could not keep %s in the archive cache: %s" % (src, e))
 
     # do we need to change perms?
     file_args['path'] = dest
     try:
         changed = module.set_fs_attributes_if_different(file_args, changed)
-    except (IOError, OSError):
-        e = get_exception()
-        module.fail_json(msg="Unexpected error when accessing exploded file: %s" % str(e))
+    except (IOError, OSError) as e:
+        raise UncompressError("Unexpected error when accessing exploded file: %s" % str(e))
+
+    if module.params['manifest']:
+        try:
+            write_manifest(module, dest, archive_checksum)
+        except (IOError, OSError) as e:
+            module.warn("Could not write the manifest for %s: %s" % (dest, e))
+
+    result = dict(changed=changed)
+    if module.params['metrics']:
+        result['metrics'] = build_metrics(compressed, uncompressed, timings)
+
+    return result
+
+
+def main():
+    module = AnsibleModule(
+        # not checking because of daisy chain to file module
+        argument_spec=dict(
+            src=dict(required=False),
+            dest=dict(required=False),
+            items=dict(required=False, type='list', elements='dict'),
+            batch_workers=dict(default=4, type='int'),
+            copy=dict(default=True, type='bool'),
+            original_basename=dict(required=False),  # used to handle 'dest is a directory' via template, a slight hack
+            deep_check=dict(default=False, type='bool'),  # This check takes a long time if dest already exists.
+            download_dir=dict(default='~/.ansible/uncompress/downloads', type='path'),
+            download_parallel=dict(default=1, type='int'),
+            workers=dict(default=1, type='int'),
+            buffer_size=dict(default=BUFFER_SIZE, type='int'),
+            sparse=dict(default=False, type='bool'),
+            metrics=dict(default=False, type='bool'),
+            archive_cache=dict(required=False, type='path'),
+            checksum=dict(required=False),  # set by the action plugin, checksum of src when copy=yes
+            manifest=dict(default=False, type='bool'),
+            manifest_args=dict(required=False),  # set by the action plugin, digest of the file arguments
+        ),
+        required_one_of=[['src', 'items']],
+        mutually_exclusive=[['src', 'items']],
+        required_together=[['src', 'dest']],
+        add_file_common_args=True,
+    )
+
+    tempdir = module.tmpdir
+    items = module.params['items']
+
+    if items is None:
+        try:
+            result = uncompress(module, module.params['src'], module.params['dest'], tempdir,
+                                module.params['checksum'], module.params['original_basename'])
+        except UncompressError as e:
+            module.fail_json(msg=str(e))
+        module.exit_json(**result)
+
+    for item in items:
+        if not item.get('src') or not item.get('dest'):
+            module.fail_json(msg="Every item needs both src and dest: %s" % item)
+
+    def run_item(idx):
+        item = items[idx]
+        # each item gets its own temp dir, so items with the same file name do not collide
+        itemdir = tempfile.mkdtemp(dir=tempdir)
+        try:
+            result = uncompress(module, item['src'], item['dest'], itemdir, item.get('checksum'), item.get('original_basename'))
+        except UncompressError as e:
+            result = dict(changed=False, failed=True, msg=str(e))
+        result['dest'] = item['dest']
+        return result
+
+    pool = ThreadPoolExecutor(max_workers=max(module.params['batch_workers'], 1))
+    try:
+        results = list(pool.map(run_item, range(len(items))))
+    finally:
+        pool.shutdown()
+
+    changed = any(r['changed'] for r in results)
+    failed = [r for r in results if r.get('failed')]
+    if failed:
+        module.fail_json(msg="%d of %d items failed" % (len(failed), len(results)), changed=changed, results=results)
+
+    module.exit_json(changed=changed, results=results)
 
-    module.exit_json(changed=changed)
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,138 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+'''
+Compact MAC vendor (OUI) table.
+
+The IEEE registry is converted once into a sorted table of fixed width records (3 byte OUI + vendor name),
+which is memory mapped and binary searched, so it is never parsed at runtime and all forks share the same pages.
+
+    python plugins/plugin_utils/oui.py oui.txt ~/.ansible/oui.bin
+
+Takes the IEEE oui.txt or oui.csv files (https://standards-oui.ieee.org/oui/oui.txt).
+'''
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import csv
+import mmap
+import os
+import re
+import struct
+import sys
+
+MAGIC = b'OUI1'
+# magic, number of records, record width
+HEADER = struct.Struct('>4sIH')
+NAME_WIDTH = 61
+RECORD_WIDTH = 3 + NAME_WIDTH
+
+DEFAULT_TABLE_ENV = 'ANSIBLE_OUI_TABLE'
+DEFAULT_TABLE = '~/.ansible/oui.bin'
+
+# 00-00-0C   (hex)		Cisco Systems, Inc
+TXT_LINE = re.compile(r'^\s*([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})-([0-9A-Fa-f]{2})\s+\(hex\)\s+(.*?)\s*$')
+MAC_SEPARATORS = re.compile(r'[:.\-]')
+
+# open tables, path -> (mmap, number of records)
+_tables = {}
+
+
+def parse_registry(path):
+    ''' (oui bytes, vendor) pairs from an IEEE oui.txt or oui.csv '''
+    with open(path, encoding='utf-8', errors='replace', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        if first.startswith('Registry,'):
+            for row in csv.DictReader(f):
+                assignment = row.get('Assignment', '')
+                if len(assignment) == 6:
+                    yield bytes.fromhex(assignment), row.get('Organization Name', '').strip()
+        else:
+            for line in f:
+                match = TXT_LINE.match(line)
+                if match:
+                    yield bytes.fromhex(''.join(match.group(1, 2, 3))), match.group(4)
+
+
+def _name(vendor):
+    ''' vendor name truncated to fit the record, without cutting a character in half '''
+    b_vendor = vendor.encode('utf-8')[:NAME_WIDTH]
+    return b_vendor.decode('utf-8', errors='ignore').encode('utf-8').ljust(NAME_WIDTH, b'\0')
+
+
+def build_table(src, dest):
+    ''' write the table for the registry in src to dest, returns the number of records '''
+    vendors = {}
+    for oui, vendor in parse_registry(src):
+        # the first entry wins, like the registry lookup does
+        vendors.setdefault(oui, vendor)
+
+    if os.path.dirname(dest) and not os.path.isdir(os.path.dirname(dest)):
+        os.makedirs(os.path.dirname(dest))
+
+    tmp = dest + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, len(vendors), RECORD_WIDTH))
+        for oui in sorted(vendors):
+            f.write(oui + _name(vendors[oui]))
+    os.rename(tmp, dest)
+    return len(vendors)
+
+
+def default_table():
+    return os.path.expanduser(os.environ.get(DEFAULT_TABLE_ENV, DEFAULT_TABLE))
+
+
+def open_table(path=None):
+    ''' map a table once per process, returns (mmap, number of records) '''
+    path = os.path.expanduser(path) if path else default_table()
+    if path not in _tables:
+        with open(path, 'rb') as f:
+            table = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(table) < HEADER.size:
+            raise ValueError('%s is not an OUI table' % path)
+        magic, count, width = HEADER.unpack_from(table)
+        if magic != MAGIC or width != RECORD_WIDTH or len(table) < HEADER.size + count * width:
+            raise ValueError('%s is not an OUI table or is truncated' % path)
+        _tables[path] = (table, count)
+    return _tables[path]
+
+
+def oui_of(mac):
+    ''' the 3 OUI bytes of a MAC address in any of the usual notations, or None '''
+    if not isinstance(mac, str):
+        return None
+    digits = MAC_SEPARATORS.sub('', mac)
+    if len(digits) < 6:
+        return None
+    try:
+        return bytes.fromhex(digits[:6])
+    except ValueError:
+        return None
+
+
+def lookup(mac, path=None):
+    ''' vendor name for mac, None if it is not in the table '''
+    oui = oui_of(mac)
+    if oui is None:
+        return None
+
+    table, count = open_table(path)
+    low, high = 0, count
+    while low < high:
+        middle = (low + high) // 2
+        offset = HEADER.size + middle * RECORD_WIDTH
+        key = table[offset:offset + 3]
+        if key < oui:
+            low = middle + 1
+        elif key > oui:
+            high = middle
+        else:
+            return table[offset + 3:offset + RECORD_WIDTH].rstrip(b'\0').decode('utf-8')
+    return None
+
+
+if __name__ == '__main__':
+    if len(sys.argv) not in (2, 3):
+        sys.exit('usage: %s <oui.txt|oui.csv> [table, default %s]' % (sys.argv[0], DEFAULT_TABLE))
+    print('%d vendors' % build_table(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else default_table()))
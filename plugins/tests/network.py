@@ -4,8 +4,15 @@
 from __future__ import (absolute_import, division, print_function)
 __metaclass__ = type
 
+import bisect
+import functools
 import ipaddress
+import os
 import re
+import socket
+
+from ansible.errors import AnsibleError
+from ansible_collections.bcoca.misc.plugins.plugin_utils.oui import lookup
 
 main = r"^([0-9a-f]{2}[:-]){5}[0-9a-f]{2}$"
 cisco = r"^([0-9a-f]{4}\.[0-9a-f]{4}\.[0-9a-f]{4})$"
@@ -13,149 +20,269 @@ bare = r"^[0-9a-f]{12}$"
 mac = re.compile(f"(?i){main}|{cisco}|{bare}")
 
 
-def valid_mac_address(mac):
-    return bool(mac.match(mac))
+def valid_mac_address(address):
+    return isinstance(address, str) and bool(mac.match(address))
 
 
-def valid_ip_address(ip):
+# parsed addresses and networks are shared by all tests, bounded so big inventories do not grow it forever
+CACHE_SIZE_ENV = 'ANSIBLE_NETWORK_TESTS_CACHE_SIZE'
+DEFAULT_CACHE_SIZE = 4096
 
-    valid = False
-    try:
-        dummy = ipaddress.ip_address(ip)
-        valid = True
-    except ValueError:
-        pass
-    return valid
+PARSERS = {
+    'ip': ipaddress.ip_address,
+    'ipv4': ipaddress.IPv4Address,
+    'ipv6': ipaddress.IPv6Address,
+    # a network without host bits set, so every valid mask is accepted
+    'ip_mask': lambda mask: ipaddress.ip_network(f'0.0.0.0/{mask}'),
+    'ipv4_mask': lambda mask: ipaddress.IPv4Network(f'0.0.0.0/{mask}'),
+    'ipv6_mask': lambda mask: ipaddress.IPv6Network(f'::/{mask}'),
+}
 
+# cheap shape checks for strings, anything failing these is rejected without ipaddress building objects and raising
+IPV4_SHAPE = re.compile(r'^[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}\.[0-9]{1,3}$')
+IPV6_SHAPE = re.compile(r'^[0-9a-fA-F:.]{2,45}(%[^%/]+)?$')
+PREFIX_SHAPE = re.compile(r'^[0-9]{1,3}$')
 
-def valid_ipv4_address(ip):
 
-    valid = False
+def _inet_pton(family, address):
+
     try:
-        dummy = ipaddress.IPv4Address(ip)
-        valid = True
-    except ValueError:
-        pass
+        socket.inet_pton(family, address)
+    except (OSError, ValueError):
+        return False
+    return True
 
-    return valid
 
+def _maybe_ipv4(value):
+    return IPV4_SHAPE.match(value) is not None and _inet_pton(socket.AF_INET, value)
 
-def valid_ipv6_address(ip):
 
-    valid = False
-    try:
-        dummy = ipaddress.IPv6Address(ip)
-        valid = True
-    except ValueError:
-        pass
+def _maybe_ipv6(value):
+    # the kernel does not know about scope ids, ipaddress does
+    return IPV6_SHAPE.match(value) is not None and ':' in value and _inet_pton(socket.AF_INET6, value.split('%', 1)[0])
 
-    return valid
 
+def _maybe_mask(value):
+    return PREFIX_SHAPE.match(value) is not None or IPV4_SHAPE.match(value) is not None
+
+
+PRECHECKS = {
+    'ip': lambda value: _maybe_ipv4(value) or _maybe_ipv6(value),
+    'ipv4': _maybe_ipv4,
+    'ipv6': _maybe_ipv6,
+    'ip_mask': _maybe_mask,
+    'ipv4_mask': _maybe_mask,
+    'ipv6_mask': lambda value: PREFIX_SHAPE.match(value) is not None,
+}
 
-def valid_ip_mask(mask):
 
-    valid = False
+def _parse(kind, value):
+    ''' parsed object or None if value is not valid for kind, None is cached too '''
+    if isinstance(value, str) and not PRECHECKS[kind](value):
+        return None
+
+    try:
+        return PARSERS[kind](value)
+    except (ValueError, TypeError):
+        return None
+
+
+def configure_cache(size=None):
+    ''' (re)create the cache with size entries, the default comes from the environment, 0 disables caching '''
+    global _cached_parse
+
+    if size is None:
+        try:
+            size = int(os.environ.get(CACHE_SIZE_ENV, DEFAULT_CACHE_SIZE))
+        except ValueError:
+            size = DEFAULT_CACHE_SIZE
+    _cached_parse = functools.lru_cache(maxsize=max(size, 0), typed=True)(_parse)
+
+
+def cache_info():
+    ''' how well the cache is doing '''
+    info = _cached_parse.cache_info()
+    lookups = info.hits + info.misses
+    return {
+        'hits': info.hits,
+        'misses': info.misses,
+        'maxsize': info.maxsize,
+        'currsize': info.currsize,
+        'hit_rate': float(info.hits) / lookups if lookups else 0.0,
+    }
+
+
+def parse(kind, value):
+    ''' cached parsing of value as kind (see PARSERS), returns None when invalid '''
     try:
-        dummy = ipaddress.ip_network(f'127.0.0.1/{mask}')
-        valid = True
-    except ValueError:
-        pass
+        return _cached_parse(kind, value)
+    except TypeError:
+        # unhashable, cannot be cached
+        return _parse(kind, value)
 
-    return valid
 
+configure_cache()
 
-def valid_ipv4_mask(mask):
 
-    valid = False
+def mac_vendor(address, vendor, table=None):
+    ''' the vendor of the mac address, from the OUI table, contains vendor (case insensitive) '''
+
+    if not valid_mac_address(address):
+        return False
+
     try:
-        dummy = ipaddress.IPv4Network(f'127.0.0.1/{mask}')
-        valid = True
-    except ValueError:
-        pass
+        found = lookup(address, table)
+    except (IOError, OSError, ValueError) as e:
+        raise AnsibleError('Could not read the OUI table: %s' % e) from e
 
-    return valid
+    return found is not None and vendor.lower() in found.lower()
 
 
-def valid_ipv6_mask(mask):
+def valid_ip_address(ip):
+    return parse('ip', ip) is not None
 
-    valid = False
-    try:
-        dummy = ipaddress.IPv6Network(f'::1/{mask}')
-        valid = True
-    except ValueError:
-        pass
 
-    return valid
+def valid_ipv4_address(ip):
+    return parse('ipv4', ip) is not None
 
 
-def is_multicast(ip):
+def valid_ipv6_address(ip):
+    return parse('ipv6', ip) is not None
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        return False
 
-    return is_ip.is_multicast
+def valid_ip_mask(mask):
+    return parse('ip_mask', mask) is not None
 
 
-def is_private(ip):
+def valid_ipv4_mask(mask):
+    return parse('ipv4_mask', mask) is not None
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        return False
 
-    return is_ip.is_private
+def valid_ipv6_mask(mask):
+    return parse('ipv6_mask', mask) is not None
 
 
-def is_global(ip):
+def _ip_flag(ip, attr):
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
+    is_ip = parse('ip', ip)
+    if is_ip is None:
         return False
 
-    return is_ip.is_global
+    return getattr(is_ip, attr)
 
 
-def is_unspecified(ip):
+def is_multicast(ip):
+    return _ip_flag(ip, 'is_multicast')
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        return False
 
-    return is_ip.is_unspecified
+def is_private(ip):
+    return _ip_flag(ip, 'is_private')
 
 
-def is_reserved(ip):
+def is_global(ip):
+    return _ip_flag(ip, 'is_global')
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        return False
 
-    return is_ip.is_reserved
+def is_unspecified(ip):
+    return _ip_flag(ip, 'is_unspecified')
 
 
-def is_loopback(ip):
+def is_reserved(ip):
+    return _ip_flag(ip, 'is_reserved')
 
-    try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
-        return False
 
-    return is_ip.is_loopback
+def is_loopback(ip):
+    return _ip_flag(ip, 'is_loopback')
 
 
 def is_link_local(ip):
+    return _ip_flag(ip, 'is_link_local')
+
+
+# compiled network lists, keyed by the tuple of networks, so lists changed in place are not mistaken for the old ones
+INDEX_CACHE_SIZE = 64
+_indexes = {}
+
+
+def build_network_index(networks):
+    ''' per ip version, the sorted starts and ends of the merged ranges the networks cover '''
+    ranges = {4: [], 6: []}
+    for network in networks:
+        try:
+            net = ipaddress.ip_network(network, strict=False)
+        except (ValueError, TypeError) as e:
+            raise AnsibleError('Invalid network %r' % (network,), orig_exc=e) from e
+        ranges[net.version].append((int(net.network_address), int(net.broadcast_address)))
+
+    index = {}
+    for version, spans in ranges.items():
+        merged = []
+        for start, end in sorted(spans):
+            if merged and start <= merged[-1][1] + 1:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+        index[version] = (tuple(span[0] for span in merged), tuple(span[1] for span in merged))
+    return index
+
+
+class NetworkIndex(object):
+    '''
+    Networks compiled once, as the network_index filter returns them. It cannot change after that,
+    so the tests use it as is and a lookup does not depend on how many networks there are.
+    '''
+    __slots__ = ('_ranges',)
+
+    def __init__(self, networks):
+        object.__setattr__(self, '_ranges', build_network_index(networks))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('a NetworkIndex cannot be changed')
+
+    def __contains__(self, ip):
+        starts, ends = self._ranges[ip.version]
+        value = int(ip)
+        pos = bisect.bisect_right(starts, value) - 1
+        return pos >= 0 and value <= ends[pos]
+
+    def __repr__(self):
+        return 'NetworkIndex(%d ipv4 ranges, %d ipv6 ranges)' % (len(self._ranges[4][0]), len(self._ranges[6][0]))
+
+
+def network_index(networks):
+    ''' compile networks only the first time they are seen, a NetworkIndex is already compiled '''
+    if isinstance(networks, NetworkIndex):
+        return networks
+    if isinstance(networks, str):
+        networks = [networks]
 
     try:
-        is_ip = ipaddress.ip_address(ip)
-    except ValueError:
+        key = tuple(networks)
+        index = _indexes.get(key)
+    except TypeError:
+        raise AnsibleError('Networks must be a string or a list of strings, got %r' % (networks,))
+
+    if index is None:
+        index = NetworkIndex(key)
+        if len(_indexes) >= INDEX_CACHE_SIZE:
+            # oldest goes
+            del _indexes[next(iter(_indexes))]
+        _indexes[key] = index
+
+    return index
+
+
+def in_any_network(ip, networks):
+
+    is_ip = parse('ip', ip)
+    if is_ip is None:
         return False
 
-    return is_ip.is_link_local
+    return is_ip in network_index(networks)
+
+
+def in_network(ip, network):
+    return in_any_network(ip, network)
 
 
 class TestModule(object):
@@ -165,6 +292,7 @@ class TestModule(object):
             # file testing
             'mac_address': valid_mac_address,
             'mac_addr': valid_mac_address,
+            'mac_vendor': mac_vendor,
 
             'ipv4_mask': valid_ipv4_mask,
             'ipv4_address': valid_ipv4_address,
@@ -185,4 +313,7 @@ class TestModule(object):
             'reserved_ip': is_reserved,
             'loopback_ip': is_loopback,
             'link_local_ip': is_link_local,
+
+            'in_network': in_network,
+            'in_any_network': in_any_network,
         }
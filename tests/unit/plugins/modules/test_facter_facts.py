@@ -0,0 +1,35 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.bcoca.misc.plugins.modules.facter_facts import parse_timing
+
+
+@pytest.mark.parametrize('line, seconds', [
+    ("fact 'os.name', took: 0.000123 seconds", 0.000123),
+    ("fact 'os.name', took: 1.2e-05 seconds", 0.000012),
+    ("fact 'os.name', took: 1.5E+00 seconds", 1.5),
+    ("fact 'os.name', took: (0.25) seconds", 0.25),
+    ("fact 'os.name', took: 12.5 ms", 0.0125),
+    ('fact "os.name" resolved in 3 milliseconds', 0.003),
+])
+def test_parse_timing_values(line, seconds):
+    assert parse_timing(line) == [{'name': 'os.name', 'seconds': seconds}]
+
+
+def test_parse_timing_sorts_slowest_first_and_adds_up():
+    output = '\n'.join([
+        "fact 'os', took: 1.2e-05 seconds",
+        "fact 'my_slow_fact', took: 1.5 seconds",
+        "fact 'my_slow_fact', took: 0.02 seconds",
+        "fact 'networking', took: (0.031) seconds",
+        '{"os": {}}',
+    ])
+    assert parse_timing(output) == [
+        {'name': 'my_slow_fact', 'seconds': 1.52},
+        {'name': 'networking', 'seconds': 0.031},
+        {'name': 'os', 'seconds': 0.000012},
+    ]
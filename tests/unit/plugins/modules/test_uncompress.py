@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import gzip
+import random
+import zlib
+
+from ansible_collections.bcoca.misc.plugins.modules import uncompress
+
+
+def gzip_decompressor():
+    return zlib.decompressobj(31)
+
+
+def member_starts(blob):
+    ''' where the gzip members of blob really start '''
+    starts = []
+    pos = 0
+    while pos < len(blob):
+        starts.append(pos)
+        d = gzip_decompressor()
+        d.decompress(blob[pos:])
+        pos = len(blob) - len(d.unused_data)
+    return starts
+
+
+def make_members(tmp_path, inside):
+    '''
+    Six stored (level 0) gzip members of random data, the first one with inside at 1.2M, where the first segment target
+    (1M in) finds it. Stored members keep inside as is, like a .gz file in a compressed tarball.
+    '''
+    rnd = random.Random(42)
+    first = rnd.randbytes(1200000) + inside + rnd.randbytes(300000)
+    payloads = [first] + [rnd.randbytes(1000000) for dummy in range(5)]
+    blob = b''.join(gzip.compress(payload, 0) for payload in payloads)
+    src = tmp_path / 'members.gz'
+    src.write_bytes(blob)
+    return src, blob, b''.join(payloads)
+
+
+def parallel(src, dest):
+    with open(dest, 'wb') as f_out:
+        return uncompress._parallel_uncompress(str(src), f_out, uncompress.GZIP_MEMBER, gzip_decompressor, 4)
+
+
+def test_segments_skip_false_magic(tmp_path):
+    # the magic, plausible flags and then garbage, as can turn up in compressed data
+    src, blob, data = make_members(tmp_path, b'\x1f\x8b\x08\x00' + random.Random(1).randbytes(64))
+    false_start = blob.index(b'\x1f\x8b\x08\x00', 1000000)
+
+    segments = uncompress._segments(blob, uncompress.GZIP_MEMBER, gzip_decompressor, 4)
+
+    assert false_start not in [start for start, end in segments]
+    assert set(start for start, end in segments) <= set(member_starts(blob))
+    assert parallel(src, tmp_path / 'out')
+    assert (tmp_path / 'out').read_bytes() == data
+
+
+def test_parallel_merges_segment_after_false_start(tmp_path):
+    # a whole gzip file inside a member looks like a member start in every way
+    inside = gzip.compress(b'hello world\n' * 1000)
+    src, blob, data = make_members(tmp_path, inside)
+    false_start = blob.index(inside)
+
+    segments = uncompress._segments(blob, uncompress.GZIP_MEMBER, gzip_decompressor, 4)
+
+    assert false_start in [start for start, end in segments]
+    assert parallel(src, tmp_path / 'out')
+    assert (tmp_path / 'out').read_bytes() == data
+
+
+def test_parallel_falls_back_on_a_single_member(tmp_path):
+    data = random.Random(3).randbytes(3000000)
+    src = tmp_path / 'single.gz'
+    src.write_bytes(gzip.compress(data, 0))
+
+    assert not parallel(src, tmp_path / 'out')
+    assert (tmp_path / 'out').read_bytes() == b''
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.bcoca.misc.plugins.filters.network import FilterModule
+from ansible_collections.bcoca.misc.plugins.tests import network
+
+NETWORKS = ['10.0.0.0/8', '10.1.0.0/16', '192.168.1.0/24', '192.168.2.0/24', '2001:db8::/32']
+
+
+@pytest.mark.parametrize('ip, expected', [
+    ('10.20.30.40', True),
+    ('192.168.1.255', True),
+    ('192.168.2.0', True),
+    ('192.168.3.1', False),
+    ('11.0.0.0', False),
+    ('2001:db8::1', True),
+    ('2001:db9::1', False),
+    ('not an ip', False),
+])
+def test_index_matches_the_list(ip, expected):
+    index = FilterModule().filters()['network_index'](NETWORKS)
+
+    assert network.in_any_network(ip, index) is expected
+    assert network.in_any_network(ip, NETWORKS) is expected
+
+
+def test_index_is_used_as_is():
+    index = network.network_index(NETWORKS)
+
+    assert network.network_index(index) is index
+    with pytest.raises(AttributeError):
+        index._ranges = {}
+
+
+def test_list_changed_in_place_is_compiled_again():
+    networks = ['10.0.0.0/8']
+    assert network.in_any_network('172.16.0.1', networks) is False
+
+    networks.append('172.16.0.0/12')
+    assert network.in_any_network('172.16.0.1', networks) is True